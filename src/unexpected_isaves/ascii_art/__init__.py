@@ -0,0 +1,3 @@
+from .ascii_art import to_ascii, to_ascii_frames
+
+__all__ = ["to_ascii", "to_ascii_frames"]
@@ -0,0 +1,323 @@
+import html
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from ..images import ImageInput, is_image, load_image
+from ..progress import CancellationToken, Progress, ProgressCallback
+
+# 70 levels of gray
+GSCALE_70 = "$@B%8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\\|()1{}[]?-_+~<>i!lI;:,\"^`'. "
+
+# 10 levels of gray
+GSCALE_10 = "@%#*+=-:. "
+
+COLOR_MODES = ("ansi", "html")
+
+_ANSI_RESET = "\x1b[0m"
+
+# How many rows of pixels are summed at once
+_BAND_HEIGHT = 256
+
+
+def _tile_starts(
+    size: Tuple[int, int], cols: int, scale: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes where each tile starts. Every tile ends where the next one starts, and
+    the last row and column of tiles end on the image's border.
+    """
+    # store dimensions
+    W, H = size
+
+    # compute width of tile
+    w = W / cols
+
+    # compute tile height based on aspect ratio and scale
+    h = w / scale
+
+    # compute number of rows
+    rows = int(H / h)
+
+    # check if image size is too small
+    if cols > W or rows > H:
+        raise ValueError("Image too small for specified cols.")
+
+    row_starts = np.array([int(j * h) for j in range(rows)], dtype=np.intp)
+    col_starts = np.array([int(i * w) for i in range(cols)], dtype=np.intp)
+    return row_starts, col_starts
+
+
+def _tile_sizes(
+    size: Tuple[int, int], row_starts: np.ndarray, col_starts: np.ndarray
+) -> np.ndarray:
+    W, H = size
+    heights = np.diff(row_starts, append=H)
+    widths = np.diff(col_starts, append=W)
+    return np.outer(heights, widths).astype(np.uint32)
+
+
+def _to_luminance(frame: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 2 and frame.dtype == np.uint8:
+            return frame
+        frame = Image.fromarray(frame)
+    return np.asarray(frame.convert("L"))
+
+
+def _to_rgb(frame: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 3 and frame.shape[2] == 3 and frame.dtype == np.uint8:
+            return frame
+        frame = Image.fromarray(frame)
+    return np.asarray(frame.convert("RGB"))
+
+
+def _bands(row_starts: np.ndarray, height: int) -> Iterator[Tuple[int, int]]:
+    # Groups rows of tiles into bands of about `_BAND_HEIGHT` rows of pixels
+    a = 0
+    while a < len(row_starts):
+        b = int(np.searchsorted(row_starts, row_starts[a] + _BAND_HEIGHT))
+        b = max(b, a + 1)
+        yield a, b
+        a = b
+
+
+def _render_rows(
+    frames: Iterable[Union[Image.Image, np.ndarray]],
+    cols: int,
+    scale: float,
+    more_levels: bool,
+    color: Optional[str],
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Iterator[List[str]]:
+    """
+    Renders each frame as a list of rows. The tiles' geometry and every buffer are
+    computed once, on the first frame, and reused for the following ones.
+    """
+    if more_levels:
+        gscale, levels = GSCALE_70, 69
+    else:
+        gscale, levels = GSCALE_10, 9
+    gscale = np.array(list(gscale))
+
+    size = None
+    for frame in frames:
+        luminance = _to_luminance(frame)
+        frame_size = (luminance.shape[1], luminance.shape[0])
+
+        if size is None:
+            size = frame_size
+            row_starts, col_starts = _tile_starts(size, cols, scale)
+            rows = len(row_starts)
+            row_ends = np.append(row_starts[1:], size[1])
+            tile_sizes = _tile_sizes(size, row_starts, col_starts)
+            row_sums = np.empty((rows, size[0]), dtype=np.uint32)
+            sums = np.empty((rows, cols), dtype=np.uint32)
+            chars = np.empty((rows, cols), dtype=gscale.dtype)
+            if color is not None:
+                rgb_row_sums = np.empty((rows, size[0], 3), dtype=np.uint32)
+                rgb_sums = np.empty((rows, cols, 3), dtype=np.uint32)
+        elif frame_size != size:
+            raise ValueError("Every frame must have the same size.")
+
+        if color is not None:
+            rgb = _to_rgb(frame)
+
+        tracker = Progress(rows, progress, cancel_token)
+        aimg = []
+        # Bands of rows are rendered one at a time, which bounds the memory of the
+        # sums and lets the rendering be followed and cancelled
+        for a, b in _bands(row_starts, size[1]):
+            tracker.check()
+            top, bottom = row_starts[a], row_ends[b - 1]
+
+            # Every tile is averaged at once by summing its rows, then its columns
+            np.add.reduceat(
+                luminance[top:bottom],
+                row_starts[a:b] - top,
+                axis=0,
+                dtype=np.uint32,
+                out=row_sums[a:b],
+            )
+            np.add.reduceat(row_sums[a:b], col_starts, axis=1, out=sums[a:b])
+
+            # get average luminance, then look up ascii char
+            np.floor_divide(sums[a:b], tile_sizes[a:b], out=sums[a:b])
+            np.multiply(sums[a:b], np.uint32(levels), out=sums[a:b])
+            np.floor_divide(sums[a:b], np.uint32(255), out=sums[a:b])
+            gscale.take(sums[a:b], out=chars[a:b])
+
+            # Each row of single characters is read back as one string
+            band = chars[a:b].view(f"<U{cols}")[:, 0].tolist()
+
+            if color is not None:
+                np.add.reduceat(
+                    rgb[top:bottom],
+                    row_starts[a:b] - top,
+                    axis=0,
+                    dtype=np.uint32,
+                    out=rgb_row_sums[a:b],
+                )
+                np.add.reduceat(
+                    rgb_row_sums[a:b], col_starts, axis=1, out=rgb_sums[a:b]
+                )
+                np.floor_divide(
+                    rgb_sums[a:b], tile_sizes[a:b, :, np.newaxis], out=rgb_sums[a:b]
+                )
+                band = [
+                    _colorize(list(row), colors, color)
+                    for row, colors in zip(band, rgb_sums[a:b])
+                ]
+
+            aimg.extend(band)
+            tracker.update(b)
+
+        yield aimg
+
+
+def _colorize(chars: List[str], colors: np.ndarray, color: str) -> str:
+    """
+    Paints a row of characters. Adjacent characters sharing a color are merged into a
+    single escape code (or `<span>`), which keeps the output small on wide renders.
+    """
+    packed = (
+        colors[:, 0].astype(np.uint32) << 16
+        | colors[:, 1].astype(np.uint32) << 8
+        | colors[:, 2]
+    )
+    run_starts = np.flatnonzero(np.diff(packed, prepend=packed[0] + 1))
+    run_ends = np.append(run_starts[1:], len(packed))
+
+    row = []
+    for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+        text = "".join(chars[start:end])
+        r, g, b = colors[start].tolist()
+        if color == "ansi":
+            row.append(f"\x1b[38;2;{r};{g};{b}m{text}")
+        else:
+            row.append(
+                f'<span style="color:#{r:02x}{g:02x}{b:02x}">{html.escape(text, quote=False)}</span>'
+            )
+    if color == "ansi":
+        row.append(_ANSI_RESET)
+    return "".join(row)
+
+
+def to_ascii(
+    image: ImageInput,
+    path: Optional[str] = None,
+    cols: int = 80,
+    scale: float = 0.43,
+    more_levels: bool = False,
+    color: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> str:
+    """
+    - Credits - https://www.geeksforgeeks.org/converting-image-ascii-image-python/
+
+    Creates an ascii art out of an image.
+
+    Args:
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`.
+        path: The path that you want to save your `.txt` file, if you want to save it. Otherwise the function will only return the ascii art string.
+        cols: Used for computing tile width. Defaults to `80`.
+        scale: Used for computing tile height. Defaults to `0.43` - ok for a monospaced font like Courier.
+        more_levels: When set to `True` uses more ascii characters (70). Defaults to `False` (10 ascii characters).
+        color: Paints each character with the average color of its tile. `"ansi"` uses truecolor escape codes for terminals and `"html"` uses `<span>` tags, meant to be placed inside a `<pre>` element. Defaults to `None` (no colors).
+        progress: A function called with how many rows of the ascii art were made and how many there are, at most once every 0.1 seconds and always once all of them are made. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then. Defaults to `None`.
+
+    Returns:
+        The ascii art of the `image`.
+
+    Raises:
+        ValueError: "Image too small for specified cols."
+        ValueError: "Unsupported color. ..."
+    """
+    if color is not None and color not in COLOR_MODES:
+        raise ValueError(
+            f"Unsupported color. Choose one of {', '.join(COLOR_MODES)}, or None."
+        )
+
+    image = load_image(image)
+    aimg = next(
+        _render_rows([image], cols, scale, more_levels, color, progress, cancel_token)
+    )
+
+    if path is not None:
+        with open(path, "w") as f:
+            # write to file
+            for row in aimg:
+                f.write(row + "\n")
+
+    # return txt image
+    return "\n".join(aimg)
+
+
+def to_ascii_frames(
+    frames: Union[Iterable[Union[Image.Image, np.ndarray]], ImageInput],
+    cols: int = 80,
+    scale: float = 0.43,
+    more_levels: bool = False,
+    color: Optional[str] = None,
+    only_changed_rows: bool = False,
+) -> Iterator[Union[str, List[Tuple[int, str]]]]:
+    """
+    Creates an ascii art out of each frame of an animation, as they come.
+
+    The tiles' geometry and the buffers used to average them are computed on the first frame and reused for the following ones, which makes this much faster than calling `to_ascii` on every frame.
+
+    Args:
+        frames: The frames, as an iterable of images opened using the `PIL.Image` module or of `numpy` arrays (grayscale or RGB). An animated image (like a GIF), its path, its file's `bytes` (or any buffer) or a single frame as an array can be given as well. Every frame must have the same size.
+        cols: Used for computing tile width. Defaults to `80`.
+        scale: Used for computing tile height. Defaults to `0.43` - ok for a monospaced font like Courier.
+        more_levels: When set to `True` uses more ascii characters (70). Defaults to `False` (10 ascii characters).
+        color: Paints each character with the average color of its tile, just like on `to_ascii`. Defaults to `None` (no colors).
+        only_changed_rows: When set to `True`, yields only the rows that changed since the previous frame, as a list of `(row_index, row)` tuples. The first frame yields every row. Defaults to `False`.
+
+    Returns:
+        An iterator over the ascii art of each frame.
+
+    Raises:
+        ValueError: "Image too small for specified cols."
+        ValueError: "Every frame must have the same size."
+        ValueError: "Unsupported color. ..."
+    """
+    if color is not None and color not in COLOR_MODES:
+        raise ValueError(
+            f"Unsupported color. Choose one of {', '.join(COLOR_MODES)}, or None."
+        )
+
+    opened = None
+    if is_image(frames):
+        image = load_image(frames)
+        if isinstance(image, np.ndarray):
+            frames = [image]
+        else:
+            # Images opened here are closed once their frames are rendered
+            opened = image if image is not frames else None
+            frames = ImageSequence.Iterator(image)
+
+    try:
+        previous = None
+        for aimg in _render_rows(frames, cols, scale, more_levels, color):
+            if not only_changed_rows:
+                yield "\n".join(aimg)
+                continue
+
+            if previous is None:
+                yield list(enumerate(aimg))
+            else:
+                yield [
+                    (i, row)
+                    for i, (row, old) in enumerate(zip(aimg, previous))
+                    if row != old
+                ]
+            previous = aimg
+    finally:
+        if opened is not None:
+            opened.close()
@@ -0,0 +1,356 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from . import save_image
+
+# Where each converter puts its output, relative to the input's name, and which
+# file is written last (used to know whether the output is up to date).
+_OUTPUTS = {
+    "excel": (".xlsx", None),
+    "rubiks": (".xlsx", None),
+    "ascii": (".txt", None),
+    "minecraft": ("", "data/pixelart-map/functions/load.mcfunction"),
+}
+
+
+def _image_extensions() -> Tuple[str, ...]:
+    return tuple(
+        ext for ext, fmt in Image.registered_extensions().items() if fmt in Image.OPEN
+    )
+
+
+def _expand_inputs(inputs: Iterable[str], recursive: bool = False) -> List[str]:
+    extensions = _image_extensions()
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = (
+                os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            )
+            candidates = sorted(glob.glob(pattern, recursive=recursive))
+            files.extend(
+                f
+                for f in candidates
+                if os.path.isfile(f) and f.lower().endswith(extensions)
+            )
+        elif glob.has_magic(item):
+            files.extend(
+                f for f in sorted(glob.glob(item, recursive=True)) if os.path.isfile(f)
+            )
+        else:
+            files.append(item)
+
+    # Keeps the first occurrence of each file, in the order they were given
+    return list(dict.fromkeys(files))
+
+
+def _output_path(src: str, converter: str, output_dir: Optional[str]) -> str:
+    extension, _ = _OUTPUTS[converter]
+    name = os.path.splitext(os.path.basename(src))[0] + extension
+    return os.path.join(output_dir or os.path.dirname(src), name)
+
+
+def _is_up_to_date(src: str, dst: str, converter: str) -> bool:
+    _, stamp = _OUTPUTS[converter]
+    stamp_path = os.path.join(dst, stamp) if stamp else dst
+    if not os.path.exists(stamp_path):
+        return False
+    return os.path.getmtime(stamp_path) >= os.path.getmtime(src)
+
+
+def _convert(
+    converter: str, src: str, dst: str, kwargs: Dict
+) -> Tuple[str, str, float, int]:
+    """
+    Runs a single conversion. Lives at module level so that it can be sent to worker processes.
+    """
+    with Image.open(src) as image:
+        pixels = image.size[0] * image.size[1]
+
+    start = time.perf_counter()
+    if converter in ("excel", "rubiks"):
+        # Saved next to `dst` and moved over it once done, so a failed conversion keeps the previous output
+        directory, name = os.path.split(dst)
+        tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "xb") as f:
+                getattr(save_image, f"to_{converter}")(
+                    src, f, title=os.path.splitext(name)[0], **kwargs
+                )
+            os.replace(tmp, dst)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    else:
+        getattr(save_image, f"to_{converter}")(src, dst, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    return src, dst, elapsed, pixels
+
+
+def _converter_kwargs(args: argparse.Namespace) -> Dict:
+    if args.converter == "ascii":
+        return {
+            "cols": args.cols,
+            "scale": args.scale,
+            "more_levels": args.more_levels,
+            "color": args.color,
+        }
+
+    kwargs = {"lower_image_size_by": args.lower_image_size_by}
+    if args.converter == "excel":
+        kwargs["image_position"] = tuple(args.image_position)
+        kwargs["max_colors"] = args.max_colors
+    elif args.converter == "minecraft":
+        kwargs["player_pos"] = tuple(args.player_pos)
+        kwargs["minecraft_version"] = args.minecraft_version
+        kwargs["include_blocks"] = args.include_blocks
+        kwargs["exclude_blocks"] = args.exclude_blocks
+        kwargs["palette_file"] = args.palette_file
+        kwargs["staircase"] = args.staircase
+    if args.converter in ("minecraft", "rubiks"):
+        kwargs["workers"] = args.threads
+    return kwargs
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="unexpected-isaves",
+        description="Saves images as spreadsheets, minecraft datapacks, ascii arts or rubik's cube arts.",
+    )
+    subparsers = parser.add_subparsers(dest="converter", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "inputs",
+        nargs="+",
+        help="Image files, directories or glob patterns (e.g. 'photos/**/*.png').",
+    )
+    common.add_argument(
+        "-o",
+        "--output-dir",
+        help="Where to save the outputs. Defaults to each input's own directory.",
+    )
+    common.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="How many worker processes to use. 0 uses every available core. Defaults to 1.",
+    )
+    common.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Converts every input, even if its output is already up to date.",
+    )
+    common.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Looks for images in subdirectories of the given directories as well.",
+    )
+
+    resizable = argparse.ArgumentParser(add_help=False)
+    resizable.add_argument(
+        "--lower-image-size-by",
+        type=int,
+        default=10,
+        help="A factor that the image's dimensions are divided by. Defaults to 10.",
+    )
+
+    threaded = argparse.ArgumentParser(add_help=False)
+    threaded.add_argument(
+        "-t",
+        "--threads",
+        type=int,
+        default=1,
+        help="How many threads map each image's colors. Defaults to 1.",
+    )
+
+    excel_parser = subparsers.add_parser(
+        "excel", parents=[common, resizable], help="Saves images as .xlsx files."
+    )
+    excel_parser.add_argument(
+        "--image-position",
+        type=int,
+        nargs=2,
+        default=(0, 0),
+        metavar=("ROW", "COL"),
+        help="The position of the top leftmost pixel. Defaults to 0 0.",
+    )
+    excel_parser.add_argument(
+        "--max-colors",
+        type=int,
+        help="Reduces each image to at most this many colors. Defaults to keeping every color.",
+    )
+
+    minecraft_parser = subparsers.add_parser(
+        "minecraft",
+        parents=[common, resizable, threaded],
+        help="Saves images as minecraft datapacks.",
+    )
+    minecraft_parser.add_argument(
+        "--player-pos",
+        type=int,
+        nargs=3,
+        default=(0, 0, 0),
+        metavar=("X", "Y", "Z"),
+        help="The player's position. Defaults to 0 0 0.",
+    )
+    minecraft_parser.add_argument(
+        "--minecraft-version",
+        default="1.18.2",
+        help="The minecraft version. Defaults to 1.18.2.",
+    )
+    minecraft_parser.add_argument(
+        "--include-blocks",
+        nargs="+",
+        metavar="BLOCK",
+        help="The only blocks the pixel art can be built with. Defaults to every block.",
+    )
+    minecraft_parser.add_argument(
+        "--exclude-blocks",
+        nargs="+",
+        metavar="BLOCK",
+        help="Blocks the pixel art cannot be built with, such as sand.",
+    )
+    minecraft_parser.add_argument(
+        "--palette-file",
+        help="A JSON file with the colors and blocks to choose from, in the format of blocks.json.",
+    )
+    minecraft_parser.add_argument(
+        "--staircase",
+        action="store_true",
+        help="Builds a staircase map art, whose blocks show on the map in 3 shades.",
+    )
+
+    ascii_parser = subparsers.add_parser(
+        "ascii", parents=[common], help="Saves images as ascii arts."
+    )
+    ascii_parser.add_argument(
+        "--cols", type=int, default=80, help="Number of columns. Defaults to 80."
+    )
+    ascii_parser.add_argument(
+        "--scale",
+        type=float,
+        default=0.43,
+        help="Used for computing tile height. Defaults to 0.43.",
+    )
+    ascii_parser.add_argument(
+        "--more-levels",
+        action="store_true",
+        help="Uses 70 ascii characters instead of 10.",
+    )
+    ascii_parser.add_argument(
+        "--color",
+        choices=("ansi", "html"),
+        help="Paints each character with its tile's color, using ANSI escape codes or HTML.",
+    )
+
+    subparsers.add_parser(
+        "rubiks",
+        parents=[common, resizable, threaded],
+        help="Saves images as rubik's cube arts in .xlsx files.",
+    )
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `unexpected-isaves` command.
+
+    Args
+        argv: The command line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns
+        The exit code: `0` if every conversion succeeded, `1` otherwise.
+    """
+    args = _build_parser().parse_args(argv)
+    kwargs = _converter_kwargs(args)
+
+    sources = _expand_inputs(args.inputs, recursive=args.recursive)
+    if not sources:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    # Inputs with the same name would silently overwrite each other's output
+    destinations: Dict[str, List[str]] = {}
+    for src in sources:
+        dst = _output_path(src, args.converter, args.output_dir)
+        destinations.setdefault(os.path.normcase(os.path.abspath(dst)), []).append(src)
+    clashes = [srcs for srcs in destinations.values() if len(srcs) > 1]
+    for srcs in clashes:
+        dst = _output_path(srcs[0], args.converter, args.output_dir)
+        print(f"{', '.join(srcs)} would all be saved as {dst}.", file=sys.stderr)
+    if clashes:
+        print(
+            "Nothing was converted. Rename the inputs or convert them separately.",
+            file=sys.stderr,
+        )
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = []
+    skipped = 0
+    for src in sources:
+        dst = _output_path(src, args.converter, args.output_dir)
+        if (
+            not args.force
+            and os.path.exists(src)
+            and _is_up_to_date(src, dst, args.converter)
+        ):
+            print(f"{src} -> {dst}: up to date, skipped")
+            skipped += 1
+            continue
+        jobs.append((args.converter, src, dst, kwargs))
+
+    workers = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    failed = 0
+    total_pixels = 0
+    start = time.perf_counter()
+
+    def report(result: Tuple[str, str, float, int]) -> None:
+        nonlocal total_pixels
+        src, dst, elapsed, pixels = result
+        total_pixels += pixels
+        print(
+            f"{src} -> {dst}: {elapsed:.2f}s ({pixels / max(elapsed, 1e-9) / 1e6:.2f} Mpx/s)"
+        )
+
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                report(_convert(*job))
+            except Exception as e:
+                print(f"{job[1]}: {e}", file=sys.stderr)
+                failed += 1
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = {executor.submit(_convert, *job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    report(future.result())
+                except Exception as e:
+                    print(f"{futures[future][1]}: {e}", file=sys.stderr)
+                    failed += 1
+
+    elapsed = time.perf_counter() - start
+    converted = len(jobs) - failed
+    print(
+        f"{converted} converted, {skipped} skipped, {failed} failed in {elapsed:.2f}s "
+        f"({total_pixels / max(elapsed, 1e-9) / 1e6:.2f} Mpx/s)"
+    )
+
+    return int(failed > 0)
@@ -1,3 +1,3 @@
-from .excel import to_excel
+from .excel import to_excel, to_excel_gallery, to_excel_tiles
 
-__all__ = [to_excel]
+__all__ = ["to_excel", "to_excel_gallery", "to_excel_tiles"]
@@ -1,101 +1,86 @@
+import io
 import os
-from typing import List, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Type, Union
 
 import numpy as np
-from openpyxl import Workbook, styles, utils
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from openpyxl.worksheet.hyperlink import Hyperlink
 from PIL import Image
 
+from ..images import ImageInput, LoadedImage, image_size, load_image
+from ..palette import build_lookup, color_histogram, median_cut, reduce_colors
+from ..progress import CancellationToken, Progress, ProgressCallback
+from ..strips import STRIP_HEIGHT, iter_strips
+from ..writers import (
+    OpenpyxlWriter,
+    Output,
+    Writer,
+    get_writer,
+    is_stream,
+    save,
+    sheet_title,
+)
 
-def _save(
-    processed_pil_image: List[List[str]],
-    path: Union[os.PathLike, str],
-    image_position: Tuple[int, int],
-    **spreadsheet_kwargs,
-) -> None:
-    starting_row, starting_col = image_position
-    ending_row, ending_col = (
-        starting_row + len(processed_pil_image),
-        starting_col + len(processed_pil_image[0]),
-    )
-
-    wb = Workbook()
-    ws = wb.active
-
-    image_name = os.path.splitext(os.path.split(path)[1])[0]
-    ws.title = image_name
-
-    for row in range(starting_row, ending_row + 1):
-        for col in range(starting_col, ending_col + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.value = processed_pil_image[row - starting_row - 1][
-                col - starting_col - 1
-            ]
 
-            # Makes cells squared
-            ws.row_dimensions[row].height = spreadsheet_kwargs.get("row_height", 15)
-            ws.column_dimensions[
-                utils.get_column_letter(col)
-            ].width = spreadsheet_kwargs.get("column_width", 2.3)
+def _resized_size(image: LoadedImage, lower_image_size_by: int) -> Tuple[int, int]:
+    width, height = image_size(image)
+    return width // lower_image_size_by, height // lower_image_size_by
 
-            # Painting the cell
-            cell.fill = styles.PatternFill(
-                start_color=cell.value, end_color=cell.value, fill_type="solid"
-            )
-            if spreadsheet_kwargs.get("delete_cell_value", True):
-                cell.value = None  # Deletes the text from the cell
 
-    # Saves spreadsheet already zoomed in or out
-    ws.sheet_view.zoomScale = spreadsheet_kwargs.get("zoom_scale", 20)
-    wb.save(path)
-    return None
+def _reduce_palette(image: LoadedImage, size: Tuple[int, int], max_colors: int):
+    # The palette must represent the whole image, so its colors are counted strip by strip
+    counts, sums = 0, 0
+    for strip in iter_strips(image, size):
+        strip_counts, strip_sums = color_histogram(np.asarray(strip))
+        counts, sums = counts + strip_counts, sums + strip_sums
 
+    colors = median_cut(counts, sums, max_colors)
+    return build_lookup(counts, sums, colors), colors
 
-def _load_image(image: Union[Image.Image, os.PathLike, str]) -> Image.Image:
-    if isinstance(image, (os.PathLike, str)):
-        if not os.path.exists(image):
-            raise ValueError("Error loading image. Image path not found.")
-        image = Image.open(image)
-    return image
 
+def _process(
+    image: LoadedImage, size: Tuple[int, int], max_colors: Optional[int] = None
+) -> Iterator[np.ndarray]:
+    if max_colors is not None:
+        lookup, colors = _reduce_palette(image, size, max_colors)
 
-def _to_openpyxl_colors(image: Image.Image) -> List[List[str]]:
-    image_colors_processed = [
-        ["%02x%02x%02x" % tuple(item) for item in row]
-        for row in np.array(image).tolist()
-    ]
-    return image_colors_processed
-
-
-def _process(image: Image.Image, lower_image_size_by: int):
-    image_rgb = image.convert("RGB")
-    image_rgb_resized = image_rgb.resize(
-        (
-            image_rgb.size[0] // lower_image_size_by,
-            image_rgb.size[1] // lower_image_size_by,
-        )
-    )
-    image_openpyxl_colors_resized = _to_openpyxl_colors(image_rgb_resized)
-
-    return image_openpyxl_colors_resized
+    for strip in iter_strips(image, size):
+        strip = np.asarray(strip)
+        if max_colors is not None:
+            strip = reduce_colors(strip, lookup, colors)
+        yield strip
 
 
 def to_excel(
-    image: Union[Image.Image, os.PathLike, str],
-    path: Union[os.PathLike, str],
+    image: ImageInput,
+    path: Optional[Output] = None,
     lower_image_size_by: int = 10,
     image_position: Tuple[int, int] = (0, 0),
+    max_colors: Optional[int] = None,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    title: Optional[str] = None,
     **spreadsheet_kwargs,
-) -> None:
+) -> Optional[bytes]:
     """
     - Coded originally on https://github.com/Eric-Mendes/image2excel
 
     Saves an image as a `.xlsx` file by coloring its cells each pixel's color.
 
     Args
-        image: Your image opened using the `PIL.Image` module or the image's path.
-        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file (example: `/home/user/Documents/my_image.xlsx`), or a writable binary stream, such as an `io.BytesIO` or an HTTP response, which is left open. Defaults to `None` (the output is returned as `bytes`, without touching the disk).
         lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`. It is very important that you lower your image's dimensions because a big image might take the function a long time to process plus your spreadsheet will probably take a long time to load on any software that you use to open it.
         image_position: a tuple determining the position of the top leftmost pixel. Cannot have negative values. Defaults to `(0,0)`.
+        max_colors: Reduces the image to at most this many colors before saving it. Every color becomes a style on the spreadsheet, so photos (which can have tens of thousands of colors) save and open much faster with it. `256` is barely noticeable on most images. Defaults to `None` (keeps every color).
+        writer: How the output is saved. `"openpyxl"` builds the `.xlsx` with `openpyxl`; `"xlsx"` streams its XML straight to disk, which is several times faster; `"png"` saves a preview of the cells as a `.png` image; `"npz"` saves the cells' colors as a `numpy` `.npz` archive. A `unexpected_isaves.writers.Writer` subclass can be given as well. Defaults to `"openpyxl"`.
+        progress: A function called with how many of the image's rows were saved and how many there are, at most once every 0.1 seconds and always once all of them are saved. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then (a stream keeps what was already written to it). Defaults to `None`.
+        title: The sheet's title. Defaults to `path`'s file name, without its extension, or to `"image"` when there is no path.
         **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance. The default values on `row_height` and `column_width` were specifically thought out so that they make the cells squared, however - as any hardcoded value - they might not do the trick on your device. That is when you might want to tweak them a little bit.
             row_height (`float`): the rows' height. Defaults to `15`.
             column_width (`float`): the columns' width. Defaults to `2.3`.
@@ -103,9 +88,9 @@ def to_excel(
             zoom_scale (`int`): how much to zoom in or out on the spreadsheet. Defaults to `20` which seems to be the default max zoom out on most spreadsheet softwares.
 
     Returns
-        `None`, but outputs a `.xlsx` file on the given `path`.
+        The output's `bytes` when no `path` is given. Otherwise `None`, but outputs a `.xlsx` file on the given `path`.
     """
-    if os.path.exists(path):
+    if path is not None and not is_stream(path) and os.path.exists(path):
         raise ValueError(
             f"{path} already exists. Please provide a new path for your .xlsx."
         )
@@ -113,17 +98,382 @@ def to_excel(
     if image_position[0] < 0 or image_position[1] < 0:
         raise ValueError("image_position cannot have negative values.")
 
-    pil_image = _load_image(image)
-    processed_pil_image = _process(pil_image, lower_image_size_by)
+    if max_colors is not None and max_colors < 1:
+        raise ValueError("max_colors must be at least 1.")
+
+    get_writer(writer)
+
+    pil_image = load_image(image)
+    size = _resized_size(pil_image, lower_image_size_by)
+    if isinstance(pil_image, Image.Image) and pil_image is not image:
+        # The image was opened here, so it is safe to let the decoder shrink it.
+        # Only JPEG supports this, it is a no-op on every other format
+        pil_image.draft("RGB", size)
+    processed_strips = Progress(size[1], progress, cancel_token).track(
+        _process(pil_image, size, max_colors)
+    )
     image_position_processed = (
         image_position[0] + int(image_position[0] == 0),
         image_position[1] + int(image_position[1] == 0),
     )
-    save_result = _save(
-        processed_pil_image,
-        path=path,
+    output = io.BytesIO() if path is None else path
+    save(
+        processed_strips,
+        size=size,
+        path=output,
         image_position=image_position_processed,
+        writer=writer,
+        title=title,
         **spreadsheet_kwargs,
     )
 
-    return save_result
+    if path is None:
+        return output.getvalue()
+    return None
+
+
+# Excel's own grid limits
+MAX_ROWS = 1_048_576
+MAX_COLUMNS = 16_384
+
+_INDEX_HEADER = [
+    "Tile",
+    "Tile row",
+    "Tile column",
+    "First row",
+    "Last row",
+    "First column",
+    "Last column",
+]
+
+
+def _tile_path(path: Union[os.PathLike, str], tile_row: int, tile_col: int) -> str:
+    root, extension = os.path.splitext(os.fspath(path))
+    return f"{root}_r{tile_row}c{tile_col}{extension}"
+
+
+def _save_tile(
+    colors: np.ndarray, path: Union[os.PathLike, str], **spreadsheet_kwargs
+) -> None:
+    """
+    Saves a single tile in its own workbook. Lives at module level so that it can be sent to worker processes.
+    """
+    size = (colors.shape[1], colors.shape[0])
+    save([colors], size, path, **spreadsheet_kwargs)
+
+
+def _write_index(
+    ws: WriteOnlyWorksheet,
+    tiles: List[Tuple[str, int, int, int, int, int, int]],
+    link_to_files: bool,
+) -> None:
+    ws.append(_INDEX_HEADER)
+    for name, *bounds in tiles:
+        if link_to_files:
+            # Workbooks are saved next to each other, so they are linked by file name
+            name = os.path.basename(name)
+            link = Hyperlink(ref="", target=name)
+        else:
+            link = Hyperlink(ref="", location=f"'{name}'!A1")
+        cell = WriteOnlyCell(ws, value=name)
+        cell.hyperlink = link
+        ws.append([cell, *bounds])
+
+
+def to_excel_tiles(
+    image: ImageInput,
+    path: Union[os.PathLike, str],
+    lower_image_size_by: int = 10,
+    tile_size: Tuple[int, int] = (500, 500),
+    separate_workbooks: bool = False,
+    workers: int = 1,
+    **spreadsheet_kwargs,
+) -> List[str]:
+    """
+    Saves an image as a `.xlsx` file by coloring its cells each pixel's color, splitting it into tiles of `tile_size` cells.
+
+    Each tile goes to its own worksheet, named `r<tile row>c<tile column>`, or to its own workbook next to `path`. Either way, `path` gets an `index` sheet telling where each tile is and which rows and columns of the image it holds. This is how images wider than Excel's 16,384 columns (or taller than its 1,048,576 rows) can be saved, and it keeps each sheet small enough to be opened comfortably.
+
+    Args
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`.
+        tile_size: The `(rows, columns)` of each tile. Defaults to `(500, 500)`.
+        separate_workbooks: When set to `True`, saves each tile in its own workbook, at `<path without extension>_r<tile row>c<tile column>.xlsx`. Defaults to `False`.
+        workers: How many processes save the tiles' workbooks at once. Only used when `separate_workbooks` is `True`. Defaults to `1`.
+        **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance, just like on `to_excel`.
+
+    Returns
+        The names of the tiles' sheets, or the paths of their workbooks, in row-major order.
+
+    Raises
+        ValueError: "... already exists. Please provide a new path for your .xlsx."
+        ValueError: "tile_size must be positive and fit in Excel's grid (1048576 rows by 16384 columns)."
+    """
+    tile_rows, tile_cols = tile_size
+    if not (0 < tile_rows <= MAX_ROWS and 0 < tile_cols <= MAX_COLUMNS):
+        raise ValueError(
+            f"tile_size must be positive and fit in Excel's grid ({MAX_ROWS} rows by {MAX_COLUMNS} columns)."
+        )
+
+    pil_image = load_image(image)
+    size = _resized_size(pil_image, lower_image_size_by)
+    width, height = size
+    n_tile_rows, n_tile_cols = ceil(height / tile_rows), ceil(width / tile_cols)
+
+    outputs = [path]
+    if separate_workbooks:
+        outputs += [
+            _tile_path(path, r, c)
+            for r in range(1, n_tile_rows + 1)
+            for c in range(1, n_tile_cols + 1)
+        ]
+    for output in outputs:
+        if os.path.exists(output):
+            raise ValueError(
+                f"{output} already exists. Please provide a new path for your .xlsx."
+            )
+
+    if isinstance(pil_image, Image.Image) and pil_image is not image:
+        # The image was opened here, so it is safe to let the decoder shrink it.
+        # Only JPEG supports this, it is a no-op on every other format
+        pil_image.draft("RGB", size)
+
+    # The index is the first sheet, but it is only written once every tile is known
+    writer = OpenpyxlWriter(path, **spreadsheet_kwargs)
+    index = writer.workbook.create_sheet("index")
+
+    tiles = []
+    executor = None
+    if separate_workbooks and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    pending = []
+
+    # A failed tile aborts the writer, and removes the tiles' workbooks saved so far
+    try:
+        with writer:
+            # Each strip holds a whole row of tiles
+            for r, strip in enumerate(iter_strips(pil_image, size, tile_rows), start=1):
+                colors = np.asarray(strip)
+                first_row = (r - 1) * tile_rows + 1
+                last_row = first_row + len(colors) - 1
+
+                for c in range(1, n_tile_cols + 1):
+                    first_col = (c - 1) * tile_cols + 1
+                    last_col = min(c * tile_cols, width)
+                    bounds = (r, c, first_row, last_row, first_col, last_col)
+
+                    if separate_workbooks:
+                        tile = colors[:, first_col - 1 : last_col]
+                        name = _tile_path(path, r, c)
+                        if executor is None:
+                            _save_tile(tile, name, **spreadsheet_kwargs)
+                        else:
+                            pending.append(
+                                executor.submit(
+                                    _save_tile, tile, name, **spreadsheet_kwargs
+                                )
+                            )
+                    else:
+                        name = f"r{r}c{c}"
+                        writer.add_sheet(name, (last_col - first_col + 1, len(colors)))
+                        writer.write(colors[:, first_col - 1 : last_col])
+                    tiles.append((name, *bounds))
+
+                # Waits for the current row of tiles so that only a few strips are in memory
+                if len(pending) >= 2 * workers:
+                    for future in pending:
+                        future.result()
+                    pending = []
+
+            for future in pending:
+                future.result()
+
+            _write_index(index, tiles, link_to_files=separate_workbooks)
+    except BaseException:
+        # Tiles still being saved must finish before their workbooks can be removed
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown()
+            executor = None
+        for output in outputs[1:]:
+            if os.path.exists(output):
+                os.remove(output)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return [name for name, *_ in tiles]
+
+
+class _RowReader:
+    """
+    Reads an image's strips a given number of rows at a time.
+    """
+
+    def __init__(self, strips: Iterator[np.ndarray]) -> None:
+        self._strips = strips
+        self._pending = np.zeros((0, 0, 3), dtype=np.uint8)
+
+    def read(self, rows: int) -> np.ndarray:
+        parts = []
+        while rows > 0:
+            if len(self._pending) == 0:
+                self._pending = next(self._strips)
+            parts.append(self._pending[:rows])
+            rows -= len(parts[-1])
+            self._pending = self._pending[len(parts[-1]) :]
+        return np.concatenate(parts)
+
+
+def _compose(
+    images: List[Tuple[Iterator[np.ndarray], Tuple[int, int], Tuple[int, int]]],
+    size: Tuple[int, int],
+    origin: Tuple[int, int],
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Lays images out on a single canvas, one strip of rows at a time. Each image is given as its strips, its size and its 1-based position; the canvas' top leftmost cell is at `origin`. Where images overlap, the last one is shown.
+
+    Returns
+        An iterator over the canvas' strips, as their colors and which of their cells no image covers.
+    """
+    width, height = size
+    readers = [
+        (_RowReader(strips), image_size, (row - origin[0], col - origin[1]))
+        for strips, image_size, (row, col) in images
+    ]
+    for top in range(0, height, STRIP_HEIGHT):
+        bottom = min(top + STRIP_HEIGHT, height)
+        colors = np.zeros((bottom - top, width, 3), dtype=np.uint8)
+        empty = np.ones((bottom - top, width), dtype=bool)
+        for reader, (image_width, image_height), (row, col) in readers:
+            first, last = max(top, row), min(bottom, row + image_height)
+            if first < last:
+                colors[first - top : last - top, col : col + image_width] = reader.read(
+                    last - first
+                )
+                empty[first - top : last - top, col : col + image_width] = False
+        yield colors, empty
+
+
+def to_excel_gallery(
+    images: Iterable[ImageInput],
+    path: Union[os.PathLike, str],
+    lower_image_size_by: int = 10,
+    image_positions: Optional[Sequence[Tuple[int, int]]] = None,
+    sheet_names: Optional[Sequence[str]] = None,
+    max_colors: Optional[int] = None,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    overwrite: bool = False,
+    **spreadsheet_kwargs,
+) -> List[str]:
+    """
+    Saves several images in a single `.xlsx` file by coloring its cells each pixel's color, each image on its own sheet or all of them on one sheet.
+
+    The workbook is saved once, and its fill styles are shared by every image, so this is much faster (and makes a smaller file) than calling `to_excel` once per image and merging the workbooks.
+
+    Args
+        images: Your images, each opened using the `PIL.Image` module, as a path, as its file's `bytes` or as a `uint8` `numpy` array, just like on `to_excel`.
+        path: The path that you want to save your output file. Example: `/home/user/Documents/my_gallery.xlsx`.
+        lower_image_size_by: A factor that the function will divide your images' dimensions by. Defaults to `10`.
+        image_positions: The position of each image's top leftmost pixel, just like `to_excel`'s `image_position`. When given, every image is saved on a single sheet, named after `path`; where images overlap, the last one is shown. Defaults to `None` (each image on its own sheet, at its top left corner).
+        sheet_names: The name of each image's sheet. Defaults to the images' file names, or `image` when they have none. Names are made unique and valid for Excel.
+        max_colors: Reduces each image to at most this many colors before saving it, just like on `to_excel`. Defaults to `None` (keeps every color).
+        writer: How the output is saved, just like on `to_excel`. Defaults to `"openpyxl"`.
+        overwrite: Whether to replace `path` if it already exists. Defaults to `False`.
+        **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance, just like on `to_excel`.
+
+    Returns
+        The names of the sheets, in the order they were saved.
+
+    Raises
+        ValueError: "... already exists. Please provide a new path for your .xlsx."
+        ValueError: "image_positions cannot have negative values."
+        ValueError: "Expected one image position per image."
+        ValueError: "Expected one sheet name per image."
+    """
+    images = list(images)
+    if os.path.exists(path) and not overwrite:
+        raise ValueError(
+            f"{path} already exists. Please provide a new path for your .xlsx."
+        )
+
+    if image_positions is not None:
+        if len(image_positions) != len(images):
+            raise ValueError("Expected one image position per image.")
+        if any(row < 0 or col < 0 for row, col in image_positions):
+            raise ValueError("image_positions cannot have negative values.")
+
+    if sheet_names is not None and len(sheet_names) != len(images):
+        raise ValueError("Expected one sheet name per image.")
+
+    if max_colors is not None and max_colors < 1:
+        raise ValueError("max_colors must be at least 1.")
+
+    writer_class = get_writer(writer)
+
+    pil_images, sizes = [], []
+    for image in images:
+        pil_image = load_image(image)
+        size = _resized_size(pil_image, lower_image_size_by)
+        if isinstance(pil_image, Image.Image) and pil_image is not image:
+            # The image was opened here, so it is safe to let the decoder shrink it.
+            # Only JPEG supports this, it is a no-op on every other format
+            pil_image.draft("RGB", size)
+        pil_images.append(pil_image)
+        sizes.append(size)
+
+    used: Set[str] = set()
+    titles = []
+    with writer_class(path, **spreadsheet_kwargs) as w:
+        if image_positions is not None:
+            positions = [
+                (row + int(row == 0), col + int(col == 0))
+                for row, col in image_positions
+            ]
+            origin = (
+                min((row for row, _ in positions), default=1),
+                min((col for _, col in positions), default=1),
+            )
+            canvas_size = (
+                max(
+                    (col + width for (_, col), (width, _) in zip(positions, sizes)),
+                    default=origin[1],
+                )
+                - origin[1],
+                max(
+                    (row + height for (row, _), (_, height) in zip(positions, sizes)),
+                    default=origin[0],
+                )
+                - origin[0],
+            )
+
+            titles.append(
+                sheet_title(os.path.splitext(os.path.basename(path))[0], used)
+            )
+            w.add_sheet(titles[0], canvas_size, origin)
+            layout = [
+                (_process(pil_image, size, max_colors), size, position)
+                for pil_image, size, position in zip(pil_images, sizes, positions)
+            ]
+            for colors, empty in _compose(layout, canvas_size, origin):
+                w.write(colors, empty)
+        else:
+            for i, (image, pil_image, size) in enumerate(
+                zip(images, pil_images, sizes)
+            ):
+                if sheet_names is not None:
+                    name = sheet_names[i]
+                else:
+                    filename = image if isinstance(image, (os.PathLike, str)) else None
+                    filename = filename or getattr(image, "filename", "")
+                    name = os.path.splitext(os.path.basename(filename))[0]
+                titles.append(sheet_title(name, used))
+
+                w.add_sheet(titles[-1], size)
+                for strip in _process(pil_image, size, max_colors):
+                    w.write(strip)
+
+    return titles
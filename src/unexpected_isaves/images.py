@@ -0,0 +1,114 @@
+import io
+import os
+from typing import Any, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+# Every way an image can be given to the converters
+ImageInput = Union[
+    Image.Image, os.PathLike, str, bytes, bytearray, memoryview, np.ndarray
+]
+
+# An image ready to be read: opened by Pillow, or an array of pixels
+LoadedImage = Union[Image.Image, np.ndarray]
+
+
+def _check_array(array: np.ndarray) -> np.ndarray:
+    if array.dtype != np.uint8 or not (
+        array.ndim == 2 or (array.ndim == 3 and array.shape[2] in (3, 4))
+    ):
+        raise ValueError(
+            "Unsupported array. Images must be uint8 arrays of shape (height, width),"
+            f" (height, width, 3) or (height, width, 4), not {array.dtype} of shape {array.shape}."
+        )
+    return array
+
+
+def is_image(image: Any) -> bool:
+    """
+    Whether `image` is a single image, given in any of the ways `load_image` accepts, rather than a collection of images. Only arrays of 2 or 3 dimensions are single images.
+    """
+    if isinstance(image, np.ndarray):
+        return image.ndim in (2, 3)
+    if isinstance(image, (Image.Image, os.PathLike, str, bytes)):
+        return True
+    try:
+        memoryview(image)
+    except TypeError:
+        return False
+    return True
+
+
+def load_image(image: ImageInput) -> LoadedImage:
+    """
+    Gets an image ready to be read, without decoding or copying it.
+
+    Pillow images and `numpy` arrays (`np.memmap` included) are returned untouched, so
+    arrays are only read, one strip at a time, when the image is converted. Paths and
+    encoded files given as `bytes` (or any other buffer) are opened lazily by Pillow;
+    `bytes` are read in place, other buffers are copied once.
+
+    Args
+        image: The image opened using the `PIL.Image` module, its path, its file's contents as `bytes` or a buffer, or its pixels as a `uint8` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`.
+
+    Returns
+        The Pillow image or the array.
+
+    Raises
+        ValueError: "Error loading image. Image path not found."
+        ValueError: "Unsupported array. ..."
+        ValueError: "Unsupported image. ..."
+    """
+    if isinstance(image, (Image.Image, np.ndarray)):
+        return _check_array(image) if isinstance(image, np.ndarray) else image
+
+    if isinstance(image, (os.PathLike, str)):
+        if not os.path.exists(image):
+            raise ValueError("Error loading image. Image path not found.")
+        return Image.open(image)
+
+    if isinstance(image, bytes):
+        # BytesIO shares the bytes until it is written to
+        return Image.open(io.BytesIO(image))
+    try:
+        data = memoryview(image)
+    except TypeError:
+        raise ValueError(
+            "Unsupported image. Give a PIL image, a path, the image's bytes or a numpy array."
+        ) from None
+    return Image.open(io.BytesIO(data.tobytes()))
+
+
+def image_size(image: LoadedImage) -> Tuple[int, int]:
+    """
+    The `(width, height)` of a loaded image.
+    """
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    return image.size
+
+
+def to_pil(image: LoadedImage) -> Image.Image:
+    """
+    Wraps an array as a Pillow image. Pillow shares the array's memory for grayscale and RGBA arrays, and copies RGB ones.
+    """
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+
+def is_rgb_array(image: LoadedImage) -> bool:
+    """
+    Whether an image is already an array of RGB colors, which can be read without any conversion.
+    """
+    return isinstance(image, np.ndarray) and image.ndim == 3 and image.shape[2] == 3
+
+
+def resized_colors(image: LoadedImage, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Resizes a whole image to `size`, as an array of RGB colors of shape `(height, width, 3)`. Arrays of RGB colors that already have that size are returned without a copy.
+    """
+    if is_rgb_array(image) and image_size(image) == tuple(size):
+        return image
+    return np.asarray(to_pil(image).convert("RGB").resize(size))
@@ -0,0 +1,328 @@
+import json
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .palette import candidate_table, nearest_color_indices
+
+BLOCKS_PATH = os.path.join(os.path.dirname(__file__), "blocks.json")
+
+# How many filtered palettes (and their candidate tables) are kept in memory
+_PALETTE_CACHE_SIZE = 16
+
+# What a block's color on the map is multiplied by (out of 255) when the block is
+# lower than, level with or higher than the block to its north
+SHADES = (180, 220, 255)
+
+
+class BlockPalette(NamedTuple):
+    """
+    The blocks an image can be built with.
+
+    Args
+        colors: The colors the blocks have when looked at via map, of shape `(n, 3)`.
+        names: The name of the block used to build each color (e.g. `minecraft:grass_block`).
+        candidates: The colors' `palette.candidate_table`, which speeds up finding the closest one.
+        shaded: Whether the palette holds every block in each of the `SHADES`: the colors of all blocks when lower than the block to their north, then when level with it, then when higher.
+    """
+
+    colors: np.ndarray
+    names: np.ndarray
+    candidates: np.ndarray
+    shaded: bool = False
+
+
+def _read_blocks(path: str) -> List[Dict]:
+    with open(path, "r") as file:
+        blocks = json.load(file)
+
+    if not isinstance(blocks, list) or not all(
+        isinstance(item, dict)
+        and isinstance(item.get("rgb"), list)
+        and len(item["rgb"]) == 3
+        and all(isinstance(c, int) and 0 <= c <= 255 for c in item["rgb"])
+        and isinstance(item.get("blocks"), list)
+        and item["blocks"]
+        for item in blocks
+    ):
+        raise ValueError(
+            f"Invalid palette file {path}. It must hold a list of objects like"
+            ' {"rgb": [127, 178, 56], "blocks": ["grass_block"]}, just like blocks.json.'
+        )
+    return blocks
+
+
+def _block_names(blocks: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    if blocks is None:
+        return None
+    if isinstance(blocks, str):
+        blocks = [blocks]
+    return frozenset(
+        block[len("minecraft:") :] if block.startswith("minecraft:") else block
+        for block in blocks
+    )
+
+
+def _matches(block: str, names: FrozenSet[str]) -> bool:
+    # Blocks match by their full name or by their name without a state, so that
+    # `birch_log` matches `birch_log[axis=y]`
+    return block in names or block.partition("[")[0] in names
+
+
+@lru_cache(maxsize=_PALETTE_CACHE_SIZE)
+def _load_palette(
+    include: Optional[FrozenSet[str]],
+    exclude: Optional[FrozenSet[str]],
+    path: str,
+    modified: int,
+    shaded: bool,
+) -> BlockPalette:
+    colors, names = [], []
+    for item in _read_blocks(path):
+        blocks = [
+            block
+            for block in item["blocks"]
+            if (include is None or _matches(block, include))
+            and (exclude is None or not _matches(block, exclude))
+        ]
+        if blocks:
+            colors.append(item["rgb"])
+            names.append("minecraft:" + blocks[0])
+
+    if not colors:
+        raise ValueError("No blocks are left on the palette after filtering it.")
+
+    colors, names = np.array(colors, dtype=np.uint16), np.array(names)
+    if shaded:
+        shades = np.array(SHADES, dtype=np.uint16)[:, np.newaxis, np.newaxis]
+        colors = (colors * shades // 255).reshape(-1, 3)
+        names = np.tile(names, len(SHADES))
+    if len(colors) > 256:
+        raise ValueError(
+            "A palette can have at most 256 colors (85 colors when shaded)."
+        )
+
+    colors = colors.astype(np.uint8)
+    return BlockPalette(colors, names, candidate_table(colors), shaded)
+
+
+def load_palette(
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    palette_file: Optional[Union[os.PathLike, str]] = None,
+    shaded: bool = False,
+) -> BlockPalette:
+    """
+    Loads the blocks an image can be built with, keeping for each color the first of its blocks that passes the filters and leaving out colors without any.
+
+    Palettes are cached for each distinct set of filters and palette file (until the file
+    changes), so loading the same palette again is free.
+
+    Args
+        include: The only blocks that can be used (e.g. `["white_wool", "stone"]`). Blocks match by their name with or without the `minecraft:` prefix and their state (`birch_log` matches `birch_log[axis=y]`). Defaults to `None` (every block).
+        exclude: Blocks that cannot be used, such as `sand` or `gravel`, which fall. Defaults to `None` (no block).
+        palette_file: A JSON file with the colors and blocks to use, in the format of the package's `blocks.json`: a list of objects like `{"rgb": [127, 178, 56], "blocks": ["grass_block", "slime_block"]}`. Defaults to `None` (the package's `blocks.json`).
+        shaded: Whether to make a palette three times as big, with every block in each of the `SHADES` it shows on the map, for `staircase_heights`. Defaults to `False`.
+
+    Returns
+        The palette.
+
+    Raises
+        ValueError: "No blocks are left on the palette after filtering it."
+        ValueError: "A palette can have at most 256 colors (85 colors when shaded)."
+        ValueError: "Invalid palette file ..."
+    """
+    path = os.path.abspath(palette_file if palette_file is not None else BLOCKS_PATH)
+    return _load_palette(
+        _block_names(include),
+        _block_names(exclude),
+        path,
+        os.stat(path).st_mtime_ns,
+        shaded,
+    )
+
+
+def to_block_indices(
+    colors: np.ndarray, workers: int = 1, palette: Optional[BlockPalette] = None
+) -> np.ndarray:
+    """
+    Maps each color to the block whose color on the map is the closest to it.
+
+    Args
+        colors: An array of RGB colors, of shape `(..., 3)`.
+        workers: How many threads map the colors at once. Defaults to `1`.
+        palette: The blocks to choose from, as returned by `load_palette`. Defaults to `None` (every block).
+
+    Returns
+        The index of each color's block on the palette, of shape `colors.shape[:-1]`.
+    """
+    if palette is None:
+        palette = load_palette()
+    return nearest_color_indices(
+        colors, palette.colors, workers, palette.candidates
+    ).astype(np.uint8)
+
+
+def _runs(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Runs of the same key along each row, as (row, first column, last column)
+    height, width = keys.shape
+    starts = np.ones((height, width), dtype=bool)
+    starts[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    ends = np.ones((height, width), dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+
+    rows, first = np.nonzero(starts)
+    _, last = np.nonzero(ends)
+    return rows, first, last
+
+
+def _commands(
+    keys: np.ndarray,
+    indices: np.ndarray,
+    names: np.ndarray,
+    heights: Optional[np.ndarray],
+    player_pos: Tuple[int, int, int],
+    setblock: bool,
+) -> List[str]:
+    player_x, player_y, player_z = player_pos
+
+    # Runs along the columns are runs along the rows of the transposed image
+    x, first, last = _runs(keys.T)
+    z_runs = _runs(keys)
+    if len(z_runs[0]) < len(x):
+        z, first, last = z_runs
+        x0, x1, z0, z1 = first, last, z, z
+    else:
+        x0, x1, z0, z1 = x, x, first, last
+    blocks = names[indices[z0, x0]]
+    if heights is None:
+        y = np.full(len(x0), player_y)
+    else:
+        y = heights[z0, x0] + player_y
+
+    # Strings are only made here, once the commands are known
+    return [
+        (
+            f"setblock {a + player_x} {h} {b + player_z} {block}"
+            if setblock and a == c and b == d
+            else f"fill {a + player_x} {h} {b + player_z} {c + player_x} {h} {d + player_z} {block}"
+        )
+        for a, b, c, d, h, block in zip(
+            x0.tolist(),
+            z0.tolist(),
+            x1.tolist(),
+            z1.tolist(),
+            y.tolist(),
+            blocks.tolist(),
+        )
+    ]
+
+
+def fill_commands(
+    indices: np.ndarray,
+    player_pos: Tuple[int, int, int] = (0, 0, 0),
+    palette: Optional[BlockPalette] = None,
+) -> List[str]:
+    """
+    Makes the commands that build an image's pixel art, filling each run of the same block with a single command.
+
+    Runs are looked for along the image's columns and along its rows, and whichever
+    direction needs fewer commands is used (columns, on a tie).
+
+    Args
+        indices: The index of each pixel's block, as returned by `to_block_indices`, of shape `(z, x)`.
+        player_pos: The player's (x, y, z) position.
+        palette: The palette the indices are on, as returned by `load_palette`. Defaults to `None` (every block).
+
+    Returns
+        The `fill` commands, sorted by the column (or row) they fill.
+    """
+    names = (palette if palette is not None else load_palette()).names
+    return _commands(indices, indices, names, None, player_pos, setblock=False)
+
+
+def staircase_heights(indices: np.ndarray, palette: BlockPalette) -> np.ndarray:
+    """
+    Finds the height of each block of a map art, so that each of them shows on the map in the shade it was mapped to.
+
+    A block is shaded by comparing its height with the block to its north (the row above
+    it on the image): bright blocks must be higher, flat ones level with it and dark ones
+    lower. An extra row of blocks to the north of the image shades its first row.
+
+    Each block is placed as low as its shade allows: as high as the climb of bright blocks
+    leading to it from the north, or as the descent of dark blocks following it to the
+    south, whichever is higher. So columns only grow as tall as their longest climb or
+    descent, instead of drifting up and down with every shade.
+
+    Args
+        indices: The index of each pixel's block on a shaded palette, as returned by `to_block_indices`, of shape `(z, x)`.
+        palette: The shaded palette, as returned by `load_palette` with `shaded=True`.
+
+    Returns
+        The height of each block above the lowest of its column, of shape `(z + 1, x)`, starting with the extra row.
+
+    Raises
+        ValueError: "Staircase heights need a shaded palette."
+    """
+    if not palette.shaded:
+        raise ValueError("Staircase heights need a shaded palette.")
+
+    # How each block compares with the block to its north: -1 (dark), 0 or 1 (bright)
+    steps = np.zeros((indices.shape[0] + 1, indices.shape[1]), dtype=np.int8)
+    steps[1:] = indices // (len(palette.colors) // len(SHADES))
+    steps[1:] -= 1
+
+    # The climb leading to each block counts bright blocks since the last dark one
+    climbs = np.cumsum(steps == 1, axis=0, dtype=np.int32)
+    climbs -= np.maximum.accumulate(np.where(steps == -1, climbs, 0), axis=0)
+
+    # The descent following each block counts dark blocks until the next bright one,
+    # which is a climb when going south to north
+    following = np.zeros_like(steps)
+    following[:-1] = steps[1:]
+    following = following[::-1]
+    descents = np.cumsum(following == -1, axis=0, dtype=np.int32)
+    descents -= np.maximum.accumulate(np.where(following == 1, descents, 0), axis=0)
+
+    return np.maximum(climbs, descents[::-1])
+
+
+def staircase_commands(
+    indices: np.ndarray,
+    heights: np.ndarray,
+    player_pos: Tuple[int, int, int] = (0, 0, 0),
+    palette: Optional[BlockPalette] = None,
+) -> List[str]:
+    """
+    Makes the commands that build a map art as a staircase, filling each run of the same block at the same height with a single command and placing lone blocks with `setblock`.
+
+    The extra row of blocks shading the image's first row is built one block north of the
+    player, with the same blocks as the first row.
+
+    Args
+        indices: The index of each pixel's block on a shaded palette, as returned by `to_block_indices`, of shape `(z, x)`.
+        heights: The height of each block, as returned by `staircase_heights`, of shape `(z + 1, x)`.
+        player_pos: The player's (x, y, z) position. The lowest blocks are placed at the player's height.
+        palette: The shaded palette, as returned by `load_palette` with `shaded=True`. Defaults to `None` (every block).
+
+    Returns
+        The `fill` and `setblock` commands, sorted by the column (or row) they build.
+    """
+    if palette is None:
+        palette = load_palette(shaded=True)
+
+    # Blocks are compared regardless of their shade, which is given by their height
+    indices = np.concatenate([indices[:1], indices])
+    blocks = indices % (len(palette.colors) // len(SHADES))
+    keys = heights.astype(np.int64) << 8 | blocks
+    player_x, player_y, player_z = player_pos
+    return _commands(
+        keys,
+        indices,
+        palette.names,
+        heights,
+        (player_x, player_y, player_z - 1),
+        setblock=True,
+    )
@@ -0,0 +1,259 @@
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Colors are bucketed on their 5 most significant bits per channel
+_BITS = 5
+_BINS = 1 << (3 * _BITS)
+
+# How many colors are compared against the palette at once, which bounds the
+# size of the distance matrix
+_CHUNK_SIZE = 4096
+
+
+def _keys(colors: np.ndarray) -> np.ndarray:
+    shift = 8 - _BITS
+    colors = colors.reshape(-1, 3) >> shift
+    return (
+        colors[:, 0].astype(np.intp) << (2 * _BITS)
+        | colors[:, 1].astype(np.intp) << _BITS
+        | colors[:, 2]
+    )
+
+
+def color_histogram(colors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Counts an RGB array's colors, bucketed on their 5 most significant bits.
+
+    Args
+        colors: An array of RGB colors, of shape `(..., 3)`.
+
+    Returns
+        How many colors fell on each of the 32768 buckets, and the sum of those colors (so that their mean can be computed).
+    """
+    keys = _keys(colors)
+    counts = np.bincount(keys, minlength=_BINS)
+    sums = np.stack(
+        [
+            np.bincount(keys, weights=channel, minlength=_BINS)
+            for channel in colors.reshape(-1, 3).T
+        ],
+        axis=1,
+    )
+    return counts, sums
+
+
+def median_cut(counts: np.ndarray, sums: np.ndarray, max_colors: int) -> np.ndarray:
+    """
+    Picks up to `max_colors` colors representing a histogram made by `color_histogram`.
+
+    The buckets are recursively split in two at the weighted median of the channel
+    they vary the most, always splitting the box with the widest range, and each
+    resulting box is represented by the mean of its colors.
+
+    Args
+        counts: How many colors fell on each bucket. Histograms of several images can be added together.
+        sums: The sum of the colors that fell on each bucket.
+        max_colors: The maximum amount of colors on the palette.
+
+    Returns
+        The palette, as an array of shape `(n, 3)` with `n <= max_colors`.
+    """
+    if max_colors < 1:
+        raise ValueError("max_colors must be at least 1.")
+
+    used = np.flatnonzero(counts)
+    if len(used) == 0:
+        return np.zeros((0, 3), dtype=np.uint8)
+    counts, sums = counts[used], sums[used]
+    means = sums / counts[:, np.newaxis]
+
+    # Boxes hold positions on the used buckets. They are kept on a heap of their
+    # widest range, ties going to the oldest box, so each split costs O(log n)
+    boxes = []
+    created = itertools.count()
+
+    def push(box: np.ndarray) -> None:
+        ranges = np.ptp(means[box], axis=0)
+        heapq.heappush(boxes, (-ranges.max(), next(created), box, ranges))
+
+    push(np.arange(len(used)))
+    while len(boxes) < max_colors:
+        widest, _, box, ranges = boxes[0]
+        if widest == 0:
+            break  # every box holds a single bucket
+        heapq.heappop(boxes)
+        channel = int(np.argmax(ranges))
+
+        order = box[np.argsort(means[box, channel], kind="stable")]
+        cumulative = np.cumsum(counts[order])
+        median = int(np.searchsorted(cumulative, cumulative[-1] / 2)) + 1
+        median = min(median, len(order) - 1)
+        push(order[:median])
+        push(order[median:])
+
+    # The palette lists the boxes in the order they were made
+    palette = [
+        sums[box].sum(axis=0) / counts[box].sum()
+        for _, _, box, _ in sorted(boxes, key=lambda entry: entry[1])
+    ]
+    return np.rint(palette).astype(np.uint8)
+
+
+def candidate_table(palette: np.ndarray) -> np.ndarray:
+    """
+    Finds, for each bucket of colors sharing their 5 most significant bits, the colors of the palette that can be the closest to any color of the bucket.
+
+    A color of the palette can only be the closest to a color of the bucket if it is at
+    most as far from the bucket as the farthest point of the bucket is from some color of
+    the palette, so every other color is left out.
+
+    Args
+        palette: The palette, of shape `(n, 3)`.
+
+    Returns
+        The index on the palette of each bucket's candidates, of shape `(32768, k)`, sorted and padded by repeating the last one.
+    """
+    shift = 8 - _BITS
+    keys = np.arange(_BINS)
+    low = np.stack(
+        [
+            (keys >> (2 * _BITS)) << shift,
+            ((keys >> _BITS) & ((1 << _BITS) - 1)) << shift,
+            (keys & ((1 << _BITS) - 1)) << shift,
+        ],
+        axis=1,
+    ).astype(np.int32)
+    high = low + (1 << shift) - 1
+    palette = palette.astype(np.int32)
+
+    # Buckets are handled in chunks, which bounds the size of the distance matrices
+    mask = np.empty((_BINS, len(palette)), dtype=bool)
+    for start in range(0, _BINS, _CHUNK_SIZE):
+        nearest = np.zeros((_CHUNK_SIZE, len(palette)), dtype=np.int32)
+        farthest = np.zeros((_CHUNK_SIZE, len(palette)), dtype=np.int32)
+        for channel in range(3):
+            lo = low[start : start + _CHUNK_SIZE, channel, np.newaxis]
+            hi = high[start : start + _CHUNK_SIZE, channel, np.newaxis]
+            color = palette[np.newaxis, :, channel]
+            nearest += (np.maximum(lo - color, 0) + np.maximum(color - hi, 0)) ** 2
+            farthest += np.maximum(np.abs(color - lo), np.abs(color - hi)) ** 2
+        mask[start : start + _CHUNK_SIZE] = nearest <= farthest.min(
+            axis=1, keepdims=True
+        )
+
+    counts = mask.sum(axis=1)
+    table = np.empty((_BINS, counts.max()), np.min_scalar_type(len(palette) - 1))
+    padding = np.minimum(np.arange(table.shape[1]), counts[:, np.newaxis] - 1)
+    for start in range(0, _BINS, _CHUNK_SIZE):
+        chunk = slice(start, start + _CHUNK_SIZE)
+        order = np.argsort(~mask[chunk], axis=1, kind="stable")
+        table[chunk] = np.take_along_axis(order, padding[chunk], axis=1)
+    return table
+
+
+def nearest_color_indices(
+    colors: np.ndarray,
+    palette: np.ndarray,
+    workers: int = 1,
+    candidates: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Maps each color to the closest color of the palette, as if they were points in a
+    3-dimensional space. Ties go to the color that comes first on the palette.
+
+    Args
+        colors: An array of RGB colors, of shape `(..., 3)`.
+        palette: The palette, of shape `(n, 3)`.
+        workers: How many threads map the colors at once. Each thread maps its own chunks of colors, so the result does not depend on it. Defaults to `1`.
+        candidates: The palette's `candidate_table`, so that each color is only compared against its bucket's candidates. The result is the same. Defaults to `None` (every color is compared against the whole palette).
+
+    Returns
+        The index on the palette of each color, of shape `colors.shape[:-1]`.
+    """
+    flat = colors.reshape(-1, 3).astype(np.int32)
+    palette = palette.astype(np.int32)
+    indices = np.empty(len(flat), dtype=np.intp)
+
+    def map_chunk(start: int) -> None:
+        chunk = flat[start : start + _CHUNK_SIZE]
+        if candidates is None:
+            distances = (
+                (chunk[:, np.newaxis, :] - palette[np.newaxis, :, :]) ** 2
+            ).sum(axis=2)
+            indices[start : start + _CHUNK_SIZE] = distances.argmin(axis=1)
+            return
+
+        # Candidates are sorted, so ties still go to the first color on the palette
+        chunk_candidates = candidates[_keys(chunk)]
+        distances = ((chunk[:, np.newaxis, :] - palette[chunk_candidates]) ** 2).sum(
+            axis=2
+        )
+        nearest = distances.argmin(axis=1)[:, np.newaxis]
+        indices[start : start + _CHUNK_SIZE] = np.take_along_axis(
+            chunk_candidates, nearest, axis=1
+        )[:, 0]
+
+    starts = range(0, len(flat), _CHUNK_SIZE)
+    if workers > 1 and len(starts) > 1:
+        # numpy releases the GIL while computing the distances
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(map_chunk, starts):
+                pass
+    else:
+        for start in starts:
+            map_chunk(start)
+    return indices.reshape(colors.shape[:-1])
+
+
+def build_lookup(
+    counts: np.ndarray, sums: np.ndarray, palette: np.ndarray
+) -> np.ndarray:
+    """
+    Maps every bucket of a histogram made by `color_histogram` to its closest color of
+    the palette, so that images can be reduced to it with a single lookup per pixel.
+
+    Args
+        counts: How many colors fell on each bucket.
+        sums: The sum of the colors that fell on each bucket.
+        palette: The palette, of shape `(n, 3)`.
+
+    Returns
+        The index on the palette of each bucket.
+    """
+    # Buckets are represented by the mean of their colors, or by their center if empty
+    shift = 8 - _BITS
+    keys = np.arange(_BINS)
+    centers = np.stack(
+        [
+            (keys >> (2 * _BITS)) << shift,
+            ((keys >> _BITS) & ((1 << _BITS) - 1)) << shift,
+            (keys & ((1 << _BITS) - 1)) << shift,
+        ],
+        axis=1,
+    ) + (1 << shift >> 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(
+            counts[:, np.newaxis] > 0, sums / counts[:, np.newaxis], centers
+        )
+    return nearest_color_indices(np.rint(means), palette)
+
+
+def reduce_colors(
+    colors: np.ndarray, lookup: np.ndarray, palette: np.ndarray
+) -> np.ndarray:
+    """
+    Replaces every color by its closest color of the palette, using a lookup made by `build_lookup`.
+
+    Args
+        colors: An array of RGB colors, of shape `(..., 3)`.
+        lookup: The index on the palette of each bucket.
+        palette: The palette, of shape `(n, 3)`.
+
+    Returns
+        An array just like `colors`, only with colors of the palette.
+    """
+    return palette[lookup[_keys(colors)]].reshape(colors.shape)
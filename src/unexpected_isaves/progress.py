@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Sized, TypeVar
+
+# The shortest time, in seconds, between two calls to a progress callback
+PROGRESS_INTERVAL = 0.1
+
+ProgressCallback = Callable[[int, int], None]
+
+T = TypeVar("T", bound=Sized)
+
+
+class ConversionCancelled(Exception):
+    """
+    Raised by a conversion when its `CancellationToken` is cancelled.
+    """
+
+
+class CancellationToken:
+    """
+    Lets a conversion be stopped from another thread (e.g. when a client disconnects). Conversions check it between strips of rows and raise `ConversionCancelled` once it is cancelled, without leaving a partial output behind.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise ConversionCancelled("The conversion was cancelled.")
+
+
+class Progress:
+    """
+    Reports how many of a conversion's `total` rows are done, calling `callback(done, total)` at most once every `PROGRESS_INTERVAL` seconds (and always once all of them are done), and checks the conversion's cancellation token.
+
+    Args
+        total: How many rows the conversion has.
+        callback: The function called with the rows done and `total`. Defaults to `None` (progress is not reported).
+        cancel_token: The conversion's cancellation token. Defaults to `None` (the conversion cannot be cancelled).
+    """
+
+    def __init__(
+        self,
+        total: int,
+        callback: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> None:
+        self.total = total
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self._last_report = time.monotonic()
+
+    def check(self) -> None:
+        """
+        Raises `ConversionCancelled` if the conversion was cancelled.
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def update(self, done: int) -> None:
+        """
+        Reports that `done` rows are done, unless it was reported too recently.
+        """
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if done >= self.total or now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self.callback(done, self.total)
+
+    def track(self, strips: Iterable[T]) -> Iterator[T]:
+        """
+        Yields `strips`, checking the cancellation token before each of them and reporting their rows once they are consumed.
+        """
+        done = 0
+        for strip in strips:
+            self.check()
+            yield strip
+            done += len(strip)
+            self.update(done)
+        self.check()
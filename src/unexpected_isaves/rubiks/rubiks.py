@@ -1,122 +1,72 @@
+import io
 import os
-from math import sqrt
-from typing import List, Tuple, Union
+from typing import Iterator, Optional, Tuple, Type, Union
 
 import numpy as np
-from openpyxl import Workbook, styles, utils
 from PIL import Image
 
+from ..images import ImageInput, LoadedImage, image_size, load_image
+from ..palette import nearest_color_indices
+from ..progress import CancellationToken, Progress, ProgressCallback
+from ..strips import iter_strips, map_strips
+from ..writers import Output, Writer, get_writer, is_stream, save
 
-def _save(
-    processed_pil_image: List[List[str]],
-    path: Union[os.PathLike, str],
-    **spreadsheet_kwargs,
-) -> int:
-    wb = Workbook()
-    ws = wb.active
-
-    image_name = os.path.splitext(os.path.split(path)[1])[0]
-    ws.title = image_name
-
-    for row in range(1, len(processed_pil_image) + 1):
-        for col in range(1, len(processed_pil_image[0]) + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.value = processed_pil_image[row - 1][col - 1]
-
-            # Makes cells squared
-            ws.row_dimensions[row].height = spreadsheet_kwargs.get("row_height", 15)
-            ws.column_dimensions[
-                utils.get_column_letter(col)
-            ].width = spreadsheet_kwargs.get("column_width", 2.3)
-
-            # Painting the cell
-            cell.fill = styles.PatternFill(
-                start_color=cell.value, end_color=cell.value, fill_type="solid"
-            )
-            if spreadsheet_kwargs.get("delete_cell_value", True):
-                cell.value = None  # Deletes the text from the cell
-
-    # Saves spreadsheet already zoomed in or out
-    ws.sheet_view.zoomScale = spreadsheet_kwargs.get("zoom_scale", 20)
-    wb.save(path)
-
-    return len(processed_pil_image) // 3 * len(processed_pil_image[0]) // 3
-
-
-def _load_image(image: Union[Image.Image, os.PathLike, str]) -> Image.Image:
-    if isinstance(image, (os.PathLike, str)):
-        if not os.path.exists(image):
-            raise ValueError("Error loading image. Image path not found.")
-        image = Image.open(image)
-    return image
-
-
-def _map_to_rubiks_palette(color: Tuple[int, int, int]) -> Tuple[int, int, int]:
-    palette = [
+# The standard colors of a rubik's cube
+_PALETTE = np.array(
+    [
         (255, 0, 0),  # red
         (0, 255, 0),  # green
         (0, 0, 255),  # blue
         (255, 255, 0),  # yellow
         (255, 255, 255),  # white
         (255, 128, 0),  # orange
-    ]
-    min_dist = None
-    mapped_color = None
-
-    for clr in palette:
-        euclidean_distance = sqrt(sum([pow(p - c, 2) for p, c in zip(clr, color)]))
-
-        if min_dist is None or euclidean_distance < min_dist:
-            min_dist = euclidean_distance
-            mapped_color = clr
+    ],
+    dtype=np.uint8,
+)
 
-    return mapped_color
 
+def _to_rubiks_colors(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    return _PALETTE[nearest_color_indices(np.asarray(image), _PALETTE)]
 
-def _to_openpyxl_colors(image: Image.Image) -> List[List[str]]:
-    image_colors_mapped = [
-        [_map_to_rubiks_palette(color) for color in row]
-        for row in np.array(image).tolist()
-    ]
-    image_colors_processed = [
-        ["%02x%02x%02x" % tuple(item) for item in row] for row in image_colors_mapped
-    ]
-    return image_colors_processed
 
-
-def _process(image: Image.Image, lower_image_size_by: int):
-    image_rgb = image.convert("RGB")
-    image_rgb_resized = image_rgb.resize(
-        (
-            image_rgb.size[0] // lower_image_size_by,
-            image_rgb.size[1] // lower_image_size_by,
-        )
+def _resized_size(image: LoadedImage, lower_image_size_by: int) -> Tuple[int, int]:
+    # Each cube shows 3x3 stickers, so both dimensions are rounded to a multiple of 3
+    width, height = image_size(image)
+    return (
+        int(round(width // lower_image_size_by / 3)) * 3,
+        int(round(height // lower_image_size_by / 3)) * 3,
     )
-    image_rgb_resized_in_rubiks = image_rgb_resized.resize(
-        (
-            int(round(image_rgb_resized.size[0] / 3)) * 3,
-            int(round(image_rgb_resized.size[1] / 3)) * 3,
-        )
-    )
-    image_openpyxl_colors_resized = _to_openpyxl_colors(image_rgb_resized_in_rubiks)
 
-    return image_openpyxl_colors_resized
+
+def _process(
+    image: LoadedImage, size: Tuple[int, int], workers: int = 1
+) -> Iterator[np.ndarray]:
+    return map_strips(_to_rubiks_colors, iter_strips(image, size), workers)
 
 
 def to_rubiks(
-    image: Union[Image.Image, os.PathLike],
-    path: Union[os.PathLike, str],
+    image: ImageInput,
+    path: Optional[Output] = None,
     lower_image_size_by: int = 10,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    title: Optional[str] = None,
     **spreadsheet_kwargs,
-) -> None:
+) -> Union[int, Tuple[int, bytes]]:
     """
     Saves an image as a `.xlsx` file by mapping its colors to the closest of the standard colors of a rubik's cube, then coloring its cells accordingly.
 
     Args
-        image: Your image opened using the `PIL.Image` module or the image's path.
-        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file (example: `/home/user/Documents/my_image.xlsx`), or a writable binary stream, such as an `io.BytesIO` or an HTTP response, which is left open. Defaults to `None` (the output is returned as `bytes`, without touching the disk).
         lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`. It is very important that you lower your image's dimensions because a big image might take the function a long time to process plus your spreadsheet will probably take a long time to load on any software that you use to open it.
-        image_position: a tuple determining the position of the top leftmost pixel. Cannot have negative values. Defaults to `(0,0)`.
+        writer: How the output is saved: `"openpyxl"`, `"xlsx"`, `"png"`, `"npz"` or a `unexpected_isaves.writers.Writer` subclass, just like on `to_excel`. Defaults to `"openpyxl"`.
+        workers: How many threads map strips of the image to the cube's colors at once. The output does not depend on it. Defaults to `1`.
+        progress: A function called with how many of the image's rows were saved and how many there are, at most once every 0.1 seconds and always once all of them are saved. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then (a stream keeps what was already written to it). Defaults to `None`.
+        title: The sheet's title. Defaults to `path`'s file name, without its extension, or to `"image"` when there is no path.
         **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance. The default values on `row_height` and `column_width` were specifically thought out so that they make the cells squared, however - as any hardcoded value - they might not do the trick on your device. That is when you might want to tweak them a little bit.
             row_height (`float`): the rows' height. Defaults to `15`.
             column_width (`float`): the columns' width. Defaults to `2.3`.
@@ -124,19 +74,36 @@ def to_rubiks(
             zoom_scale (`int`): how much to zoom in or out on the spreadsheet. Defaults to `20` which seems to be the default max zoom out on most spreadsheet softwares.
 
     Returns
-        An integer representing how many rubik's cubes are needed to make the generated image.
+        An integer representing how many rubik's cubes are needed to make the generated image. When no `path` is given, a tuple of that integer and the output's `bytes`.
     """
-    if os.path.exists(path):
+    if path is not None and not is_stream(path) and os.path.exists(path):
         raise ValueError(
             f"{path} already exists. Please provide a new path for your .xlsx."
         )
 
-    pil_image = _load_image(image)
-    processed_pil_image = _process(pil_image, lower_image_size_by)
-    save_result = _save(
-        processed_pil_image,
-        path=path,
+    get_writer(writer)
+
+    pil_image = load_image(image)
+    size = _resized_size(pil_image, lower_image_size_by)
+    if isinstance(pil_image, Image.Image) and pil_image is not image:
+        # The image was opened here, so it is safe to let the decoder shrink it.
+        # Only JPEG supports this, it is a no-op on every other format
+        pil_image.draft("RGB", size)
+    processed_strips = Progress(size[1], progress, cancel_token).track(
+        _process(pil_image, size, workers)
+    )
+    output = io.BytesIO() if path is None else path
+    save(
+        processed_strips,
+        size=size,
+        path=output,
+        writer=writer,
+        title=title,
         **spreadsheet_kwargs,
     )
 
-    return save_result
+    width, height = size
+    cubes = height // 3 * width // 3
+    if path is None:
+        return cubes, output.getvalue()
+    return cubes
@@ -1,33 +1,46 @@
 import json
 import os
 from contextlib import suppress
-from math import sqrt
-from typing import List, Optional, Tuple, Union
+from functools import partial
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
 
 import numpy as np
-import pandas as pd
 from PIL import Image
 
-from . import excel, rubiks
+from . import ascii_art, excel, minecraft, rubiks
+from .images import ImageInput, image_size, load_image, resized_colors
+from .progress import CancellationToken, Progress, ProgressCallback
+from .strips import STRIP_HEIGHT, map_strips
+from .writers import Output, Writer
 
 
 def to_excel(
-    image: Union[Image.Image, str, os.PathLike],
-    path: Union[str, os.PathLike],
+    image: ImageInput,
+    path: Optional[Output] = None,
     lower_image_size_by: int = 10,
     image_position: Tuple[int, int] = (0, 0),
+    max_colors: Optional[int] = None,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    title: Optional[str] = None,
     **spreadsheet_kwargs,
-) -> None:
+) -> Optional[bytes]:
     """
     - Coded originally on https://github.com/Eric-Mendes/image2excel
 
     Saves an image as a `.xlsx` file by coloring its cells each pixel's color.
 
     Args
-        image: Your image opened using the `PIL.Image` module or the image's path.
-        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file (example: `/home/user/Documents/my_image.xlsx`), or a writable binary stream, such as an `io.BytesIO` or an HTTP response, which is left open. Defaults to `None` (the output is returned as `bytes`, without touching the disk).
         lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`. It is very important that you lower your image's dimensions because a big image might take the function a long time to process plus your spreadsheet will probably take a long time to load on any software that you use to open it.
         image_position: a tuple determining the position of the top leftmost pixel. Cannot have negative values. Defaults to `(0,0)`.
+        max_colors: Reduces the image to at most this many colors before saving it. Every color becomes a style on the spreadsheet, so photos (which can have tens of thousands of colors) save and open much faster with it. `256` is barely noticeable on most images. Defaults to `None` (keeps every color).
+        writer: How the output is saved. `"openpyxl"` builds the `.xlsx` with `openpyxl`; `"xlsx"` streams its XML straight to disk, which is several times faster; `"png"` saves a preview of the cells as a `.png` image; `"npz"` saves the cells' colors as a `numpy` `.npz` archive. A `unexpected_isaves.writers.Writer` subclass can be given as well. Defaults to `"openpyxl"`.
+        progress: A function called with how many of the image's rows were saved and how many there are, at most once every 0.1 seconds and always once all of them are saved. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then (a stream keeps what was already written to it). Defaults to `None`.
+        title: The sheet's title. Defaults to `path`'s file name, without its extension, or to `"image"` when there is no path.
         **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance. The default values on `row_height` and `column_width` were specifically thought out so that they make the cells squared, however - as any hardcoded value - they might not do the trick on your device. That is when you might want to tweak them a little bit.
             row_height (`float`): the rows' height. Defaults to `15`.
             column_width (`float`): the columns' width. Defaults to `2.3`.
@@ -35,13 +48,108 @@ def to_excel(
             zoom_scale (`int`): how much to zoom in or out on the spreadsheet. Defaults to `20` which seems to be the default max zoom out on most spreadsheet softwares.
 
     Returns
-        `None`, but outputs a `.xlsx` file on the given `path`.
+        The output's `bytes` when no `path` is given. Otherwise `None`, but outputs a `.xlsx` file on the given `path`.
     """
-    excel.to_excel(
+    return excel.to_excel(
         image,
         path,
         lower_image_size_by,
         image_position,
+        max_colors,
+        writer,
+        progress,
+        cancel_token,
+        title,
+        **spreadsheet_kwargs,
+    )
+
+
+def to_excel_tiles(
+    image: ImageInput,
+    path: Union[str, os.PathLike],
+    lower_image_size_by: int = 10,
+    tile_size: Tuple[int, int] = (500, 500),
+    separate_workbooks: bool = False,
+    workers: int = 1,
+    **spreadsheet_kwargs,
+) -> List[str]:
+    """
+    Saves an image as a `.xlsx` file by coloring its cells each pixel's color, splitting it into tiles of `tile_size` cells.
+
+    Each tile goes to its own worksheet, named `r<tile row>c<tile column>`, or to its own workbook next to `path`. Either way, `path` gets an `index` sheet telling where each tile is and which rows and columns of the image it holds. This is how images wider than Excel's 16,384 columns (or taller than its 1,048,576 rows) can be saved, and it keeps each sheet small enough to be opened comfortably.
+
+    Args
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`.
+        tile_size: The `(rows, columns)` of each tile. Defaults to `(500, 500)`.
+        separate_workbooks: When set to `True`, saves each tile in its own workbook, at `<path without extension>_r<tile row>c<tile column>.xlsx`. Defaults to `False`.
+        workers: How many processes save the tiles' workbooks at once. Only used when `separate_workbooks` is `True`. Defaults to `1`.
+        **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance, just like on `to_excel`.
+
+    Returns
+        The names of the tiles' sheets, or the paths of their workbooks, in row-major order.
+
+    Raises
+        ValueError: "... already exists. Please provide a new path for your .xlsx."
+        ValueError: "tile_size must be positive and fit in Excel's grid (1048576 rows by 16384 columns)."
+    """
+    return excel.to_excel_tiles(
+        image,
+        path,
+        lower_image_size_by,
+        tile_size,
+        separate_workbooks,
+        workers,
+        **spreadsheet_kwargs,
+    )
+
+
+def to_excel_gallery(
+    images: Iterable[ImageInput],
+    path: Union[str, os.PathLike],
+    lower_image_size_by: int = 10,
+    image_positions: Optional[Sequence[Tuple[int, int]]] = None,
+    sheet_names: Optional[Sequence[str]] = None,
+    max_colors: Optional[int] = None,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    overwrite: bool = False,
+    **spreadsheet_kwargs,
+) -> List[str]:
+    """
+    Saves several images in a single `.xlsx` file by coloring its cells each pixel's color, each image on its own sheet or all of them on one sheet.
+
+    The workbook is saved once, and its fill styles are shared by every image, so this is much faster (and makes a smaller file) than calling `to_excel` once per image and merging the workbooks.
+
+    Args
+        images: Your images, each opened using the `PIL.Image` module, as a path, as its file's `bytes` or as a `uint8` `numpy` array, just like on `to_excel`.
+        path: The path that you want to save your output file. Example: `/home/user/Documents/my_gallery.xlsx`.
+        lower_image_size_by: A factor that the function will divide your images' dimensions by. Defaults to `10`.
+        image_positions: The position of each image's top leftmost pixel, just like `to_excel`'s `image_position`. When given, every image is saved on a single sheet, named after `path`; where images overlap, the last one is shown. Defaults to `None` (each image on its own sheet, at its top left corner).
+        sheet_names: The name of each image's sheet. Defaults to the images' file names, or `image` when they have none. Names are made unique and valid for Excel.
+        max_colors: Reduces each image to at most this many colors before saving it, just like on `to_excel`. Defaults to `None` (keeps every color).
+        writer: How the output is saved, just like on `to_excel`. Defaults to `"openpyxl"`.
+        overwrite: Whether to replace `path` if it already exists. Defaults to `False`.
+        **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance, just like on `to_excel`.
+
+    Returns
+        The names of the sheets, in the order they were saved.
+
+    Raises
+        ValueError: "... already exists. Please provide a new path for your .xlsx."
+        ValueError: "image_positions cannot have negative values."
+        ValueError: "Expected one image position per image."
+        ValueError: "Expected one sheet name per image."
+    """
+    return excel.to_excel_gallery(
+        images,
+        path,
+        lower_image_size_by,
+        image_positions,
+        sheet_names,
+        max_colors,
+        writer,
+        overwrite,
         **spreadsheet_kwargs,
     )
 
@@ -110,11 +218,18 @@ def __to_minecraft_save(
 
 
 def to_minecraft(
-    image: Union[Image.Image, str],
+    image: ImageInput,
     path: str,
     lower_image_size_by: int = 10,
     player_pos: Tuple[int, int, int] = (0, 0, 0),
     minecraft_version: str = "1.18.2",
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    include_blocks: Optional[Iterable[str]] = None,
+    exclude_blocks: Optional[Iterable[str]] = None,
+    palette_file: Optional[str] = None,
+    staircase: bool = False,
 ) -> None:
     """
     - Added on release 0.0.1;
@@ -123,109 +238,76 @@ def to_minecraft(
     Saves an image as a minecraft datapack that when loaded into your world will build a pixel art of it on the player's position.
 
     Args
-        image: Your image opened using the `PIL.Image` module or the image's path as `str`;
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`.
         path: The path that you want to save your datapack. Example: `/home/user/Documents/my_image_datapack`;
         lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`;
         player_pos: The player's (x, y, z) position. Defaults to `(0, 0, 0)`.
         minecraft_version: The minecraft version. Needs to be higher than or equal to `1.13.0`, and defaults to `1.18.2`.
+        workers: How many threads map strips of the image to blocks at once. The output does not depend on it. Defaults to `1`.
+        progress: A function called with how many of the image's rows were mapped to blocks and how many there are, at most once every 0.1 seconds and always once all of them are mapped. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then. Defaults to `None`.
+        include_blocks: The only blocks the pixel art can be built with (e.g. `["white_wool", "stone"]`), with or without the `minecraft:` prefix and their state. Each color is built with the first of its blocks that can be used, and colors without any are left out. Defaults to `None` (every block).
+        exclude_blocks: Blocks the pixel art cannot be built with, such as `sand` or `gravel`, which fall. Defaults to `None` (no block).
+        palette_file: A JSON file with the colors and blocks to choose from, in the format of the package's `blocks.json`. The filters above apply to it too. Defaults to `None` (the package's `blocks.json`).
+        staircase: Builds a map art whose blocks climb and descend along each column, so that every block shows on the map in one of 3 shades and the image is matched against 3 times as many colors. Best looked at via a map held right above the image's first row. Since blocks float, you might want to exclude the ones that fall (e.g. `exclude_blocks=["sand", "gravel"]`). Defaults to `False` (a flat pixel art at the player's height).
 
     Returns
         `None`, but outputs a datapack on the given `path`.
 
     Raises
+        ValueError: "No blocks are left on the palette after filtering it."
         ValueError: "Unsupported minecraft_version. If you feel like this is a mistake, open an issue at https://github.com/Eric-Mendes/unexpected-isaves/issues to let us know."
     """
-    if isinstance(image, str):
-        image = Image.open(image)
-
-    image = image.convert("RGB")
-
-    # Makes the commands that the datapack will run when loaded
-    def script(df, **kwargs):
-        player_pos = [
-            kwargs.get("player_x", 0),
-            kwargs.get("player_y", 0),
-            kwargs.get("player_z", 0),
-        ]
-        z = (df != df.shift()).cumsum()
-        zri = z.reset_index()
-        ix_name = z.index.name
-        co_name = z.columns.name
-        for i in z:
-            v = zri.groupby(i)[ix_name].agg(["first", "last"])
-            s = {co_name: i}
-            e = {co_name: i}
-            for _, r in v.iterrows():
-                s[ix_name] = r["first"]
-                e[ix_name] = r["last"]
-                material = df.loc[r["first"], i]
-                yield f'fill {s["x"] + player_pos[0]} {0 + player_pos[1]} {s["z"] + player_pos[2]} {e["x"] + player_pos[0]} {0 + player_pos[1]} {e["z"] + player_pos[2]} {material.split(",")[0].strip()}'
-
-    # Helper function. Loads the blocks an the colors they have when looked at via map,
-    # and maps the pixels to the blocks
-    __location__ = os.path.realpath(
-        os.path.join(os.getcwd(), os.path.dirname(__file__))
-    )
-    blocks_file = open(os.path.join(__location__, "blocks.json"), "r")
-    blocks = json.load(blocks_file)
-    blocks_file.close()
-
-    def to_minecraft_color(pxl):
-        color = None
-        min_distance = None
-        for item in blocks:
-            # Calculates the "distance" between two RGB colors as if they
-            # were points in a 3-dimensional space.
-            # The closer they are, the more they look like each other.
-            euclidean_distance = sqrt(
-                sum([pow(p - c, 2) for p, c in zip(item["rgb"], pxl)])
-            )
-
-            if min_distance is None or euclidean_distance < min_distance:
-                min_distance = euclidean_distance
-                color = ", ".join("minecraft:" + block for block in item["blocks"])
-        return color
-
-    # Resizing the image and mapping each pixel's color to a minecraft color
-    image = image.resize(
-        (image.size[0] // lower_image_size_by, image.size[1] // lower_image_size_by)
-    )
-    image_colors_processed = [
-        [to_minecraft_color(pixel) for pixel in row] for row in np.array(image)
-    ]
-
-    df = pd.DataFrame(image_colors_processed)
-
-    # Making the commands that when ran will build the image's pixel art.
-    # This part's had a huge contribution from this thread: https://stackoverflow.com/questions/70512775/how-to-group-elements-in-dataframe-by-row/70546452#70546452
-    df = df.rename_axis(index="z", columns="x")
-
-    a = list(
-        script(
-            df,
-            player_x=player_pos[0],
-            player_y=player_pos[1],
-            player_z=player_pos[2],
-        )
+    # Filtered palettes are cached, so the same filters are only applied once
+    palette = minecraft.load_palette(
+        include_blocks, exclude_blocks, palette_file, shaded=staircase
     )
-    b = list(
-        script(
-            df.T,
-            player_x=player_pos[0],
-            player_y=player_pos[1],
-            player_z=player_pos[2],
-        )
+
+    image = load_image(image)
+
+    # Resizing the image and mapping each pixel's color to the block that looks
+    # the most like it when looked at via map
+    width, height = image_size(image)
+    colors = resized_colors(
+        image, (width // lower_image_size_by, height // lower_image_size_by)
     )
-    res = min([a, b], key=len)
+    indices = np.empty(colors.shape[:2], dtype=np.uint8)
+    tracker = Progress(len(colors), progress, cancel_token)
+
+    def strips() -> Iterator[np.ndarray]:
+        # Checked before each strip is queued, so no work starts once cancelled
+        for top in range(0, len(colors), STRIP_HEIGHT):
+            tracker.check()
+            yield colors[top : top + STRIP_HEIGHT]
+
+    # The strips share a single pool of threads, each strip mapped on one of them
+    top = 0
+    for strip_indices in map_strips(
+        partial(minecraft.to_block_indices, palette=palette), strips(), workers
+    ):
+        indices[top : top + len(strip_indices)] = strip_indices
+        top += len(strip_indices)
+        tracker.update(top)
+
+    # Making the commands that when ran will build the image's pixel art
+    if staircase:
+        heights = minecraft.staircase_heights(indices, palette)
+        res = minecraft.staircase_commands(indices, heights, player_pos, palette)
+    else:
+        res = minecraft.fill_commands(indices, player_pos, palette)
+    tracker.check()
     __to_minecraft_save(res, path, minecraft_version)
 
 
 def to_ascii(
-    image: Union[Image.Image, str],
+    image: ImageInput,
     path: Optional[str] = None,
     cols: int = 80,
     scale: float = 0.43,
     more_levels: bool = False,
+    color: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
 ) -> str:
     """
     - Credits - https://www.geeksforgeeks.org/converting-image-ascii-image-python/
@@ -233,124 +315,84 @@ def to_ascii(
     Creates an ascii art out of an image.
 
     Args:
-        image: Your image opened using the `PIL.Image` module or the image's path as `str`.
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`.
         path: The path that you want to save your `.txt` file, if you want to save it. Otherwise the function will only return the ascii art string.
         cols: Used for computing tile width. Defaults to `80`.
         scale: Used for computing tile height. Defaults to `0.43` - ok for a monospaced font like Courier.
         more_levels: When set to `True` uses more ascii characters (70). Defaults to `False` (10 ascii characters).
+        color: Paints each character with the average color of its tile. `"ansi"` uses truecolor escape codes for terminals and `"html"` uses `<span>` tags, meant to be placed inside a `<pre>` element. Defaults to `None` (no colors).
+        progress: A function called with how many rows of the ascii art were made and how many there are, at most once every 0.1 seconds and always once all of them are made. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then. Defaults to `None`.
 
     Returns:
         The ascii art of the `image`.
 
     Raises:
         ValueError: "Image too small for specified cols."
+        ValueError: "Unsupported color. ..."
     """
-    # 70 levels of gray
-    gscale1 = "$@B%8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\|()1{}[]?-_+~<>i!lI;:,\"^`'. "
-
-    # 10 levels of gray
-    gscale2 = "@%#*+=-:. "
-
-    def getAverageL(image):
-        """
-        Given PIL Image, return average value of grayscale value
-        """
-        # get image as numpy array
-        im = np.array(image)
-
-        # get shape
-        w, h = im.shape
-
-        # get average
-        return np.average(im.reshape(w * h))
-
-    # open image and convert to grayscale
-    if isinstance(image, str):
-        image = Image.open(image)
-    image = image.convert("L")
-
-    # store dimensions
-    W, H = image.size[0], image.size[1]
-
-    # compute width of tile
-    w = W / cols
-
-    # compute tile height based on aspect ratio and scale
-    h = w / scale
-
-    # compute number of rows
-    rows = int(H / h)
-
-    # check if image size is too small
-    if cols > W or rows > H:
-        raise ValueError("Image too small for specified cols.")
-
-    # ascii image is a list of character strings
-    aimg = []
-    # generate list of dimensions
-    for j in range(rows):
-        y1 = int(j * h)
-        y2 = int((j + 1) * h)
-
-        # correct last tile
-        if j == rows - 1:
-            y2 = H
-
-        # append an empty string
-        aimg.append("")
-
-        for i in range(cols):
-            # crop image to tile
-            x1 = int(i * w)
-            x2 = int((i + 1) * w)
-
-            # correct last tile
-            if i == cols - 1:
-                x2 = W
-
-            # crop image to extract tile
-            img = image.crop((x1, y1, x2, y2))
-
-            # get average luminance
-            avg = int(getAverageL(img))
+    return ascii_art.to_ascii(
+        image, path, cols, scale, more_levels, color, progress, cancel_token
+    )
 
-            # look up ascii char
-            if more_levels:
-                gsval = gscale1[int((avg * 69) / 255)]
-            else:
-                gsval = gscale2[int((avg * 9) / 255)]
 
-            # append ascii char to string
-            aimg[j] += gsval
+def to_ascii_frames(
+    frames: Union[Iterable[Union[Image.Image, np.ndarray]], ImageInput],
+    cols: int = 80,
+    scale: float = 0.43,
+    more_levels: bool = False,
+    color: Optional[str] = None,
+    only_changed_rows: bool = False,
+) -> Iterator[Union[str, List[Tuple[int, str]]]]:
+    """
+    Creates an ascii art out of each frame of an animation, as they come.
 
-    if path is not None:
-        f = open(path, "w")
+    The tiles' geometry and the buffers used to average them are computed on the first frame and reused for the following ones, which makes this much faster than calling `to_ascii` on every frame.
 
-        # write to file
-        for row in aimg:
-            f.write(row + "\n")
+    Args:
+        frames: The frames, as an iterable of images opened using the `PIL.Image` module or of `numpy` arrays (grayscale or RGB). An animated image (like a GIF), its path, its file's `bytes` (or any buffer) or a single frame as an array can be given as well. Every frame must have the same size.
+        cols: Used for computing tile width. Defaults to `80`.
+        scale: Used for computing tile height. Defaults to `0.43` - ok for a monospaced font like Courier.
+        more_levels: When set to `True` uses more ascii characters (70). Defaults to `False` (10 ascii characters).
+        color: Paints each character with the average color of its tile, just like on `to_ascii`. Defaults to `None` (no colors).
+        only_changed_rows: When set to `True`, yields only the rows that changed since the previous frame, as a list of `(row_index, row)` tuples. The first frame yields every row. Defaults to `False`.
 
-        # cleanup
-        f.close()
+    Returns:
+        An iterator over the ascii art of each frame.
 
-    # return txt image
-    return "\n".join(aimg)
+    Raises:
+        ValueError: "Image too small for specified cols."
+        ValueError: "Every frame must have the same size."
+        ValueError: "Unsupported color. ..."
+    """
+    return ascii_art.to_ascii_frames(
+        frames, cols, scale, more_levels, color, only_changed_rows
+    )
 
 
 def to_rubiks(
-    image: Union[Image.Image, str, os.PathLike],
-    path: Union[str, os.PathLike],
+    image: ImageInput,
+    path: Optional[Output] = None,
     lower_image_size_by: int = 10,
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    title: Optional[str] = None,
     **spreadsheet_kwargs,
-) -> int:
+) -> Union[int, Tuple[int, bytes]]:
     """
     Saves an image as a `.xlsx` file by mapping its colors to the closest of the standard colors of a rubik's cube, then coloring its cells accordingly.
 
     Args
-        image: Your image opened using the `PIL.Image` module or the image's path.
-        path: The path that you want to save your output file. Example: `/home/user/Documents/my_image.xlsx`.
+        image: Your image opened using the `PIL.Image` module, the image's path, its file's contents as `bytes` (or any buffer), or its pixels as a `uint8` `numpy` array of shape `(height, width)`, `(height, width, 3)` or `(height, width, 4)`. Arrays (memory-mapped ones too) are read a strip at a time, without copying them whole.
+        path: The path that you want to save your output file (example: `/home/user/Documents/my_image.xlsx`), or a writable binary stream, such as an `io.BytesIO` or an HTTP response, which is left open. Defaults to `None` (the output is returned as `bytes`, without touching the disk).
         lower_image_size_by: A factor that the function will divide your image's dimensions by. Defaults to `10`. It is very important that you lower your image's dimensions because a big image might take the function a long time to process plus your spreadsheet will probably take a long time to load on any software that you use to open it.
-        image_position: a tuple determining the position of the top leftmost pixel. Cannot have negative values. Defaults to `(0,0)`.
+        writer: How the output is saved: `"openpyxl"`, `"xlsx"`, `"png"`, `"npz"` or a `unexpected_isaves.writers.Writer` subclass, just like on `to_excel`. Defaults to `"openpyxl"`.
+        workers: How many threads map strips of the image to the cube's colors at once. The output does not depend on it. Defaults to `1`.
+        progress: A function called with how many of the image's rows were saved and how many there are, at most once every 0.1 seconds and always once all of them are saved. Defaults to `None`.
+        cancel_token: A `unexpected_isaves.progress.CancellationToken` that stops the conversion, raising `unexpected_isaves.progress.ConversionCancelled`, once cancelled from another thread. Nothing is saved on `path` then (a stream keeps what was already written to it). Defaults to `None`.
+        title: The sheet's title. Defaults to `path`'s file name, without its extension, or to `"image"` when there is no path.
         **spreadsheet_kwargs: Optional parameters to tweak the spreadsheet's appearance. The default values on `row_height` and `column_width` were specifically thought out so that they make the cells squared, however - as any hardcoded value - they might not do the trick on your device. That is when you might want to tweak them a little bit.
             row_height (`float`): the rows' height. Defaults to `15`.
             column_width (`float`): the columns' width. Defaults to `2.3`.
@@ -358,6 +400,16 @@ def to_rubiks(
             zoom_scale (`int`): how much to zoom in or out on the spreadsheet. Defaults to `20` which seems to be the default max zoom out on most spreadsheet softwares.
 
     Returns
-        An integer representing how many rubik's cubes are needed to make the generated image.
+        An integer representing how many rubik's cubes are needed to make the generated image. When no `path` is given, a tuple of that integer and the output's `bytes`.
     """
-    return rubiks.to_rubiks(image, path, lower_image_size_by, **spreadsheet_kwargs)
+    return rubiks.to_rubiks(
+        image,
+        path,
+        lower_image_size_by,
+        writer,
+        workers,
+        progress,
+        cancel_token,
+        title,
+        **spreadsheet_kwargs,
+    )
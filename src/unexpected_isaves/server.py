@@ -0,0 +1,387 @@
+import argparse
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from . import minecraft, save_image
+
+CONVERTERS = ("excel", "rubiks", "minecraft", "ascii")
+
+# The converters' arguments that name a file to read or write
+_PATH_ARGUMENTS = ("image", "path", "palette_file")
+
+# How many of the latest requests each converter's latencies are computed over
+_LATENCY_WINDOW = 1000
+
+
+def _is_loopback(host: str) -> bool:
+    """
+    Whether `host` only accepts connections from this machine.
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+class Stats:
+    """
+    Counts the requests served by a `ConversionServer`, and how long they waited and took. Every method is thread safe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.queued = 0
+        self.running = 0
+        self._served = {converter: 0 for converter in CONVERTERS}
+        self._failed = {converter: 0 for converter in CONVERTERS}
+        self._waits: Dict[str, Deque[float]] = {
+            converter: deque(maxlen=_LATENCY_WINDOW) for converter in CONVERTERS
+        }
+        self._latencies: Dict[str, Deque[float]] = {
+            converter: deque(maxlen=_LATENCY_WINDOW) for converter in CONVERTERS
+        }
+
+    def enqueue(self) -> None:
+        with self._lock:
+            self.queued += 1
+
+    def start(self, converter: str, wait: float) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._waits[converter].append(wait)
+
+    def finish(self, converter: str, latency: float, failed: bool) -> None:
+        with self._lock:
+            self.running -= 1
+            self._served[converter] += 1
+            self._failed[converter] += failed
+            self._latencies[converter].append(latency)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the statistics, with times in seconds. `wait` is how long requests were queued for a worker, and `latency` how long their conversion took.
+        """
+        with self._lock:
+            converters = {}
+            for converter in CONVERTERS:
+                converters[converter] = {
+                    "served": self._served[converter],
+                    "failed": self._failed[converter],
+                }
+                for name, times in (
+                    ("wait", list(self._waits[converter])),
+                    ("latency", list(self._latencies[converter])),
+                ):
+                    converters[converter][name] = (
+                        {
+                            "mean": sum(times) / len(times),
+                            "p50": _percentile(times, 0.5),
+                            "p95": _percentile(times, 0.95),
+                            "max": max(times),
+                        }
+                        if times
+                        else None
+                    )
+            return {
+                "uptime": time.monotonic() - self._started,
+                "queued": self.queued,
+                "running": self.running,
+                "converters": converters,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ConversionServer"
+
+    def address_string(self) -> str:
+        # Clients of a Unix socket have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _reply(
+        self,
+        status: HTTPStatus,
+        body: Union[Dict[str, Any], bytes],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if isinstance(body, bytes):
+            data, content_type = body, "application/octet-stream"
+        else:
+            data, content_type = json.dumps(body).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/stats":
+            self._reply(HTTPStatus.OK, self.server.stats.as_dict())
+        elif self.path == "/health":
+            self._reply(HTTPStatus.OK, {"status": "ok"})
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"{self.path} not found."})
+
+    def do_POST(self) -> None:
+        converter = self.path.rpartition("/convert/")[2]
+        if not self.path.startswith("/convert/") or converter not in CONVERTERS:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"{self.path} not found."})
+            return
+
+        # Refusing anything but JSON keeps browsers from posting here without a CORS preflight
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type.lower() != "application/json":
+            self._reply(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                {"error": "The request's body must be application/json."},
+            )
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            kwargs = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(kwargs, dict):
+                raise ValueError("The request's body must be a JSON object.")
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+
+        status, body = self.server.convert(converter, kwargs)
+        if not isinstance(body.get("result"), bytes):
+            self._reply(status, body)
+            return
+
+        # Outputs made in memory are sent as they are, with the cubes on a header
+        headers = {"X-Rubiks-Cubes": str(body["cubes"])} if "cubes" in body else None
+        self._reply(status, body["result"], headers)
+
+
+class ConversionServer(ThreadingHTTPServer):
+    """
+    Serves conversions over local HTTP, keeping the converters imported and their tables loaded between requests.
+
+    Each request runs on its own thread, and up to `workers` conversions run at once;
+    the others wait on a queue. Endpoints:
+
+    - `POST /convert/<excel|rubiks|minecraft|ascii>`: runs `to_<converter>`, with the keyword arguments given as a JSON object (e.g. `{"image": "in.png", "path": "out.xlsx"}`) with `Content-Type: application/json`. The `image`, `path` and `palette_file` are relative to `root`, and paths outside of it are rejected. Replies with `{"result": ...}`, which holds the ascii art for `ascii` and the number of cubes for `rubiks`, or with `{"error": ...}` and status 400 when the converter rejects its arguments. Without a `path`, `excel` and `rubiks` reply with the `.xlsx` itself, never written to disk (and `rubiks` with its number of cubes on the `X-Rubiks-Cubes` header).
+    - `GET /stats`: how many requests are queued and running, and how many were served, failed, waited and took per converter.
+    - `GET /health`: `{"status": "ok"}`.
+
+    Args
+        server_address: The `(host, port)` to listen on. Port `0` picks a free port.
+        workers: How many conversions run at once. Defaults to the number of CPUs.
+        quiet: Whether to stop logging each request. Defaults to `False`.
+        root: The folder every file read or written must be in. Defaults to the current working directory.
+        allow_remote: Whether to listen on a `host` other machines can reach. Anyone who reaches the server can read and write the files in `root`. Defaults to `False`.
+
+    Raises
+        ValueError: "Refusing to listen on ... without allow_remote."
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        workers: Optional[int] = None,
+        quiet: bool = False,
+        root: Union[os.PathLike, str, None] = None,
+        allow_remote: bool = False,
+    ) -> None:
+        if (
+            isinstance(server_address, tuple)
+            and not allow_remote
+            and not _is_loopback(server_address[0])
+        ):
+            raise ValueError(
+                f"Refusing to listen on {server_address[0]} without allow_remote."
+            )
+        self.quiet = quiet
+        self.root = os.path.realpath(root if root is not None else os.getcwd())
+        self.stats = Stats()
+        self._slots = threading.BoundedSemaphore(workers or os.cpu_count() or 1)
+        warm_up()
+        super().__init__(server_address, _Handler)
+
+    def resolve(self, path: Any) -> str:
+        """
+        Resolves a path given by a client against `root`, following links.
+
+        Raises
+            ValueError: "Paths must be strings, not ..."
+            ValueError: "... is outside of the server's root."
+        """
+        if not isinstance(path, str):
+            raise ValueError(f"Paths must be strings, not {type(path).__name__}.")
+        resolved = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, resolved]) != self.root:
+            raise ValueError(f"{path} is outside of the server's root.")
+        return resolved
+
+    def convert(self, converter: str, kwargs: Dict[str, Any]) -> Tuple[int, Dict]:
+        """
+        Runs a conversion once a worker is free, and returns the reply's status and body.
+        """
+        self.stats.enqueue()
+        queued_at = time.perf_counter()
+        with self._slots:
+            started_at = time.perf_counter()
+            self.stats.start(converter, started_at - queued_at)
+            failed = True
+            try:
+                for name in _PATH_ARGUMENTS:
+                    if kwargs.get(name) is not None:
+                        kwargs[name] = self.resolve(kwargs[name])
+                result = getattr(save_image, f"to_{converter}")(**kwargs)
+                failed = False
+                if converter == "rubiks" and isinstance(result, tuple):
+                    cubes, result = result
+                    return HTTPStatus.OK, {"result": result, "cubes": cubes}
+                return HTTPStatus.OK, {"result": result}
+            except (TypeError, ValueError, OSError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            except Exception as e:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)}
+            finally:
+                self.stats.finish(
+                    converter, time.perf_counter() - started_at, failed=failed
+                )
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class UnixConversionServer(socketserver.UnixStreamServer, ConversionServer):
+        """
+        A `ConversionServer` listening on a Unix socket at `server_address`, which only local users with access to the file can reach.
+        """
+
+        def server_bind(self) -> None:
+            socketserver.UnixStreamServer.server_bind(self)
+            self.server_name, self.server_port = "localhost", 0
+
+        def server_close(self) -> None:
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def warm_up() -> None:
+    """
+    Loads what every conversion needs, so that the first requests do not pay for it.
+    """
+    from openpyxl import Workbook  # noqa: F401
+
+    minecraft.load_palette()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `unexpected-isaves-server` command.
+
+    Args
+        argv: The command line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns
+        The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="unexpected-isaves-server",
+        description="Serves conversions over local HTTP, keeping the converters loaded between requests.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="The address to listen on. Defaults to 127.0.0.1.",
+    )
+    parser.add_argument(
+        "--allow-remote",
+        action="store_true",
+        help="Allows listening on an address other machines can reach. Anyone who reaches the server can read and write the files in the root.",
+    )
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="The folder every image, output and palette file must be in. Defaults to the current working directory.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="The port to listen on. Defaults to 8765.",
+    )
+    parser.add_argument(
+        "--unix-socket",
+        metavar="PATH",
+        help="Listens on a Unix socket at PATH instead of on a TCP port.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="How many conversions run at once. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Stops logging each request."
+    )
+    args = parser.parse_args(argv)
+
+    if args.unix_socket and not hasattr(socket, "AF_UNIX"):
+        parser.error("Unix sockets are not supported on this platform.")
+    if not args.unix_socket and not args.allow_remote and not _is_loopback(args.host):
+        parser.error(
+            f"Refusing to listen on {args.host}, which other machines can reach. Pass --allow-remote to do it anyway."
+        )
+    if not os.path.isdir(args.root):
+        parser.error(f"{args.root} is not a folder.")
+
+    if args.unix_socket:
+        server = UnixConversionServer(
+            args.unix_socket, args.workers, args.quiet, args.root
+        )
+        where = args.unix_socket
+    else:
+        server = ConversionServer(
+            (args.host, args.port),
+            args.workers,
+            args.quiet,
+            args.root,
+            args.allow_remote,
+        )
+        where = f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+    print(f"Serving conversions on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil, floor
+from typing import Callable, Iterable, Iterator, Tuple, TypeVar, Union
+
+import numpy as np
+from PIL import Image
+
+from .images import LoadedImage, image_size, is_rgb_array
+
+# How many rows of the resized image are produced at once
+STRIP_HEIGHT = 64
+
+# Pillow's default resampling filter (bicubic) reads up to 2 input pixels per
+# output pixel on each side of its center
+_FILTER_SUPPORT = 2
+
+T = TypeVar("T")
+
+
+def iter_strips(
+    image: LoadedImage, size: Tuple[int, int], strip_height: int = STRIP_HEIGHT
+) -> Iterator[Union[Image.Image, np.ndarray]]:
+    """
+    Resizes `image` to `size` one horizontal strip at a time.
+
+    Each strip is cropped out of the source with enough margin for the resampling
+    filter, converted to RGB and resized on its own, so only `strip_height` rows of
+    the output (plus the matching rows of the source) are held in memory at once.
+    Concatenating the strips gives the same pixels as `image.convert("RGB").resize(size)`,
+    give or take 1 on a channel due to floating point rounding of the filter's weights.
+
+    Arrays are only read a strip at a time too, so memory-mapped ones are never loaded
+    whole. Arrays of RGB colors that need no resizing are sliced into strips without
+    any copy.
+
+    Args
+        image: The image to be resized, opened by Pillow or as an array, as returned by `images.load_image`.
+        size: The `(width, height)` of the resized image.
+        strip_height: How many rows of the resized image each strip has.
+
+    Returns
+        An iterator over the strips, from top to bottom, as RGB images (or arrays of RGB colors).
+    """
+    width, height = image_size(image)
+    if is_rgb_array(image) and (width, height) == tuple(size):
+        for first_row in range(0, height, strip_height):
+            yield image[first_row : first_row + strip_height]
+        return
+
+    out_width, out_height = size
+    scale = height / out_height if out_height else 1
+    margin = ceil(_FILTER_SUPPORT * max(scale, 1)) + 1
+
+    for first_row in range(0, out_height, strip_height):
+        last_row = min(first_row + strip_height, out_height)
+        top, bottom = first_row * scale, last_row * scale
+
+        crop_top = max(0, floor(top) - margin)
+        crop_bottom = min(height, ceil(bottom) + margin)
+        if isinstance(image, np.ndarray):
+            strip = Image.fromarray(image[crop_top:crop_bottom]).convert("RGB")
+        else:
+            strip = image.crop((0, crop_top, width, crop_bottom)).convert("RGB")
+
+        yield strip.resize(
+            (out_width, last_row - first_row),
+            box=(0, top - crop_top, width, bottom - crop_top),
+        )
+
+
+def map_strips(
+    func: Callable[[Image.Image], T], strips: Iterable[Image.Image], workers: int = 1
+) -> Iterator[T]:
+    """
+    Applies `func` to each strip on a pool of `workers` threads, yielding the results in the strips' order.
+
+    Only `2 * workers` strips are read ahead of the one being yielded, so memory
+    stays bounded no matter how many strips there are. `func` should spend its time
+    on code that releases the GIL (like `numpy` or Pillow) to make use of the threads.
+
+    Args
+        func: The function applied to each strip.
+        strips: The strips, as yielded by `iter_strips`.
+        workers: How many threads apply `func` at once. Defaults to `1`, which applies it on the calling thread.
+
+    Returns
+        An iterator over `func`'s results.
+    """
+    if workers <= 1:
+        yield from map(func, strips)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for strip in strips:
+            pending.append(executor.submit(func, strip))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
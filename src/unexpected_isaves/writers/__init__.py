@@ -0,0 +1,29 @@
+from .writers import (
+    WRITERS,
+    NpzWriter,
+    OpenpyxlWriter,
+    Output,
+    PngWriter,
+    Writer,
+    XlsxWriter,
+    check_title,
+    get_writer,
+    is_stream,
+    save,
+    sheet_title,
+)
+
+__all__ = [
+    "WRITERS",
+    "NpzWriter",
+    "OpenpyxlWriter",
+    "Output",
+    "PngWriter",
+    "Writer",
+    "XlsxWriter",
+    "check_title",
+    "get_writer",
+    "is_stream",
+    "save",
+    "sheet_title",
+]
@@ -0,0 +1,617 @@
+import abc
+import os
+import zipfile
+from contextlib import suppress
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+from openpyxl import Workbook, styles, utils
+from openpyxl.cell import WriteOnlyCell
+from PIL import Image
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+# Where writers save their output: a path or a writable binary stream
+Output = Union[os.PathLike, str, BinaryIO]
+
+
+def is_stream(output: Output) -> bool:
+    """
+    Tells whether an output is a writable stream (e.g. `io.BytesIO`) rather than a path.
+    """
+    return hasattr(output, "write")
+
+
+# Excel's own limits on sheet titles
+_MAX_TITLE_LENGTH = 31
+_INVALID_TITLE_CHARACTERS = "[]:*?/\\"
+_TITLE_REPLACEMENTS = str.maketrans(dict.fromkeys(_INVALID_TITLE_CHARACTERS, "_"))
+
+
+def check_title(title: str, used: Iterable[str] = ()) -> None:
+    """
+    Makes sure that Excel accepts a sheet's title: it must have 1 to 31 characters, none of `[]:*?/\\`, must not start or end with an apostrophe, and must not be in `used` (ignoring case, like Excel does).
+
+    Raises
+        ValueError: "Invalid sheet title ..."
+    """
+    if not isinstance(title, str) or not 0 < len(title) <= _MAX_TITLE_LENGTH:
+        raise ValueError(
+            f"Invalid sheet title {title!r}. Titles must have 1 to {_MAX_TITLE_LENGTH} characters."
+        )
+    if any(c in _INVALID_TITLE_CHARACTERS for c in title):
+        raise ValueError(
+            f"Invalid sheet title {title!r}. Titles cannot have any of {_INVALID_TITLE_CHARACTERS}."
+        )
+    if title.startswith("'") or title.endswith("'"):
+        raise ValueError(
+            f"Invalid sheet title {title!r}. Titles cannot start or end with an apostrophe."
+        )
+    if title.lower() in {t.lower() for t in used}:
+        raise ValueError(f"Invalid sheet title {title!r}. It is already used.")
+
+
+def sheet_title(name: str, used: Set[str]) -> str:
+    """
+    Makes a title that Excel accepts out of any name, replacing the characters it does not allow with `_` and numbering names already in `used`, the lowercase titles taken so far, which the new title is added to.
+    """
+    title = (
+        name.translate(_TITLE_REPLACEMENTS)[:_MAX_TITLE_LENGTH].strip("'") or "image"
+    )
+    base, n = title, 1
+    while title.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        title = base[: _MAX_TITLE_LENGTH - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def to_hex(colors: np.ndarray) -> np.ndarray:
+    """
+    Formats an array of RGB colors, of shape `(..., 3)`, as `rrggbb` strings, of shape `colors.shape[:-1]`.
+    """
+    colors = np.asarray(colors, dtype=np.uint8)
+    digits = np.empty(colors.shape[:-1] + (6,), dtype=np.uint8)
+    digits[..., 0::2] = _HEX_DIGITS[colors >> 4]
+    digits[..., 1::2] = _HEX_DIGITS[colors & 0xF]
+    return np.ascontiguousarray(digits).view("S6")[..., 0].astype("U6")
+
+
+class Writer(abc.ABC):
+    """
+    Saves processed images, given as arrays of RGB colors.
+
+    A writer saves a single output file, made of one or more sheets. Each sheet is
+    started with `add_sheet`, and then receives the image's rows, from top to bottom,
+    through one or more calls to `write`. Writers are context managers: leaving the
+    `with` block finishes the file. Every writer accepts the same sheet titles, the
+    ones Excel does (see `check_title`).
+
+    Args
+        path: The path that you want to save your output file, or a writable binary stream (e.g. `io.BytesIO`), which is left open.
+        **spreadsheet_kwargs: Optional parameters to tweak the output's appearance. Each writer uses the ones that make sense to it.
+            row_height (`float`): the rows' height. Defaults to `15`.
+            column_width (`float`): the columns' width. Defaults to `2.3`.
+            delete_cell_value (`bool`): wheter to keep or not the text corresponding to that color. Defaults to `True`.
+            zoom_scale (`int`): how much to zoom in or out on the spreadsheet. Defaults to `20`.
+            cell_size (`int`): how many pixels wide each cell is on previews. Defaults to `8`.
+    """
+
+    extension = ""
+
+    def __init__(self, path: Output, **spreadsheet_kwargs) -> None:
+        self.path = path
+        self.spreadsheet_kwargs = spreadsheet_kwargs
+        self._titles: List[str] = []
+
+    def _add_title(self, title: str) -> None:
+        check_title(title, self._titles)
+        self._titles.append(title)
+
+    @abc.abstractmethod
+    def add_sheet(
+        self,
+        title: str,
+        size: Tuple[int, int],
+        image_position: Tuple[int, int] = (1, 1),
+    ) -> None:
+        """
+        Starts a new sheet, which receives every following call to `write`.
+
+        Args
+            title: The sheet's title.
+            size: The `(width, height)` of the image on the sheet.
+            image_position: The 1-based `(row, column)` of the image's top leftmost pixel.
+
+        Raises
+            ValueError: "Invalid sheet title ..."
+        """
+
+    @abc.abstractmethod
+    def write(self, colors: np.ndarray, empty: Optional[np.ndarray] = None) -> None:
+        """
+        Writes the next rows of the current sheet.
+
+        Args
+            colors: The rows' colors, as an array of shape `(rows, width, 3)`.
+            empty: Which cells are left unpainted, as a boolean array of shape `(rows, width)`. Defaults to `None` (every cell is painted).
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """
+        Finishes the output file.
+        """
+
+    def abort(self) -> None:
+        """
+        Stops writing, without leaving a partial output file behind. Streams are left with whatever was already written to them.
+        """
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class OpenpyxlWriter(Writer):
+    """
+    Saves `.xlsx` files through a write-only `openpyxl` workbook, which streams each row to disk as soon as it is written.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(self, path: Output, **spreadsheet_kwargs) -> None:
+        super().__init__(path, **spreadsheet_kwargs)
+        self.workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._fills: Dict[str, styles.PatternFill] = {}
+
+    def add_sheet(
+        self,
+        title: str,
+        size: Tuple[int, int],
+        image_position: Tuple[int, int] = (1, 1),
+    ) -> None:
+        self._add_title(title)
+        starting_row, starting_col = image_position
+        ws = self.workbook.create_sheet(title)
+
+        # Makes cells squared. Columns must be sized before any row is written
+        for col in range(starting_col, starting_col + size[0]):
+            ws.column_dimensions[utils.get_column_letter(col)].width = (
+                self.spreadsheet_kwargs.get("column_width", 2.3)
+            )
+
+        # Saves spreadsheet already zoomed in or out
+        ws.sheet_view.zoomScale = self.spreadsheet_kwargs.get("zoom_scale", 20)
+
+        for _ in range(starting_row - 1):
+            ws.append([])
+
+        self._sheet = ws
+        self._row = starting_row
+        self._starting_col = starting_col
+
+    def write(self, colors: np.ndarray, empty: Optional[np.ndarray] = None) -> None:
+        ws = self._sheet
+        row_height = self.spreadsheet_kwargs.get("row_height", 15)
+        delete_cell_value = self.spreadsheet_kwargs.get("delete_cell_value", True)
+        hex_colors = to_hex(colors)
+        if empty is not None:
+            hex_colors[empty] = ""
+        for colors_row in hex_colors.tolist():
+            cells = [None] * (self._starting_col - 1)
+            for color in colors_row:
+                if not color:
+                    cells.append(None)
+                    continue
+                # Painting the cell. Fills are shared between cells of the same color
+                if color not in self._fills:
+                    self._fills[color] = styles.PatternFill(
+                        start_color=color, end_color=color, fill_type="solid"
+                    )
+                cell = WriteOnlyCell(ws, value=None if delete_cell_value else color)
+                cell.fill = self._fills[color]
+                cells.append(cell)
+
+            ws.row_dimensions[self._row].height = row_height
+            ws.append(cells)
+            self._row += 1
+
+    def abort(self) -> None:
+        # Each write-only sheet streams its rows to a temporary file until the workbook is saved
+        for ws in self.workbook.worksheets:
+            writer = ws._writer
+            if writer is None:
+                continue
+            with suppress(Exception):
+                if ws._rows is not None:
+                    ws._rows.close()
+                writer.close()
+            if os.path.exists(writer.out):
+                writer.cleanup()
+        self.workbook = None
+        self._sheet = None
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELATIONSHIPS_NAMESPACE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+)
+_PACKAGE_RELATIONSHIPS_NAMESPACE = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# How many fills (and styles) are formatted at once when writing the styles
+_STYLES_CHUNK_SIZE = 4096
+
+
+class XlsxWriter(Writer):
+    """
+    Saves `.xlsx` files by writing their XML straight into the zip archive, one row at a time.
+
+    It does not build any cell objects, so it is much faster than `OpenpyxlWriter`
+    and its memory does not grow with the image. Each distinct color becomes a
+    single style, shared by every sheet.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(self, path: Output, **spreadsheet_kwargs) -> None:
+        super().__init__(path, **spreadsheet_kwargs)
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._styles: Dict[int, int] = {}
+        self._stream = None
+
+    def _finish_sheet(self) -> None:
+        if self._stream is not None:
+            self._stream.write(b"</sheetData></worksheet>")
+            self._stream.close()
+            self._stream = None
+
+    def add_sheet(
+        self,
+        title: str,
+        size: Tuple[int, int],
+        image_position: Tuple[int, int] = (1, 1),
+    ) -> None:
+        self._finish_sheet()
+        self._add_title(title)
+
+        starting_row, starting_col = image_position
+        width = size[0]
+        zoom_scale = self.spreadsheet_kwargs.get("zoom_scale", 20)
+        column_width = self.spreadsheet_kwargs.get("column_width", 2.3)
+
+        header = (
+            f'{_XML_DECLARATION}<worksheet xmlns="{_MAIN_NAMESPACE}">'
+            f'<sheetViews><sheetView workbookViewId="0" zoomScale="{zoom_scale}"/></sheetViews>'
+            '<sheetFormatPr defaultRowHeight="15"/>'
+        )
+        if width:
+            header += (
+                f'<cols><col min="{starting_col}" max="{starting_col + width - 1}" '
+                f'width="{column_width}" customWidth="1"/></cols>'
+            )
+        header += "<sheetData>"
+
+        self._stream = self._zip.open(
+            f"xl/worksheets/sheet{len(self._titles)}.xml", "w", force_zip64=True
+        )
+        self._stream.write(header.encode())
+
+        self._row = starting_row
+        self._columns = [
+            utils.get_column_letter(col)
+            for col in range(starting_col, starting_col + width)
+        ]
+
+    def write(self, colors: np.ndarray, empty: Optional[np.ndarray] = None) -> None:
+        row_height = self.spreadsheet_kwargs.get("row_height", 15)
+        delete_cell_value = self.spreadsheet_kwargs.get("delete_cell_value", True)
+
+        # Styles are looked up once per distinct color of the strip, not once per cell
+        packed = (
+            colors[:, :, 0].astype(np.uint32) << 16
+            | colors[:, :, 1].astype(np.uint32) << 8
+            | colors[:, :, 2]
+        )
+        unique, inverse = np.unique(packed, return_inverse=True)
+        for color in unique.tolist():
+            if color not in self._styles:
+                # Style 0 is the default one, with no fill
+                self._styles[color] = len(self._styles) + 1
+        style_ids = np.array([self._styles[c] for c in unique.tolist()])
+        style_ids = style_ids[inverse.reshape(-1)].reshape(packed.shape)
+        if empty is not None:
+            # Empty cells are not written at all
+            style_ids[empty] = 0
+        style_ids = style_ids.tolist()
+
+        values = style_ids if delete_cell_value else to_hex(colors).tolist()
+        rows = []
+        for style_row, values_row in zip(style_ids, values):
+            r = self._row
+            if delete_cell_value:
+                cells = [
+                    f'<c r="{col}{r}" s="{s}"/>'
+                    for col, s in zip(self._columns, style_row)
+                    if s
+                ]
+            else:
+                cells = [
+                    f'<c r="{col}{r}" s="{s}" t="inlineStr"><is><t>{v}</t></is></c>'
+                    for col, s, v in zip(self._columns, style_row, values_row)
+                    if s
+                ]
+            rows.append(
+                f'<row r="{r}" ht="{row_height}" customHeight="1">{"".join(cells)}</row>'
+            )
+            self._row += 1
+        self._stream.write("".join(rows).encode())
+
+    def _write_styles(self) -> None:
+        n_styles = len(self._styles)
+        with self._zip.open("xl/styles.xml", "w", force_zip64=True) as stream:
+            # Fill 0 and 1 are reserved by Excel
+            stream.write(
+                (
+                    f'{_XML_DECLARATION}<styleSheet xmlns="{_MAIN_NAMESPACE}">'
+                    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+                    f'<fills count="{n_styles + 2}">'
+                    '<fill><patternFill patternType="none"/></fill>'
+                    '<fill><patternFill patternType="gray125"/></fill>'
+                ).encode()
+            )
+            # There is a fill and a style per color, so they are written in chunks
+            colors = list(self._styles)
+            for start in range(0, n_styles, _STYLES_CHUNK_SIZE):
+                stream.write(
+                    "".join(
+                        '<fill><patternFill patternType="solid">'
+                        f'<fgColor rgb="00{color:06x}"/><bgColor rgb="00{color:06x}"/>'
+                        "</patternFill></fill>"
+                        for color in colors[start : start + _STYLES_CHUNK_SIZE]
+                    ).encode()
+                )
+            stream.write(
+                (
+                    "</fills>"
+                    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                    f'<cellXfs count="{n_styles + 1}">'
+                    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+                ).encode()
+            )
+            for start in range(2, n_styles + 2, _STYLES_CHUNK_SIZE):
+                stream.write(
+                    "".join(
+                        f'<xf numFmtId="0" fontId="0" fillId="{fill_id}" borderId="0" xfId="0" applyFill="1"/>'
+                        for fill_id in range(
+                            start, min(start + _STYLES_CHUNK_SIZE, n_styles + 2)
+                        )
+                    ).encode()
+                )
+            stream.write(
+                (
+                    "</cellXfs>"
+                    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                    "</styleSheet>"
+                ).encode()
+            )
+
+    def abort(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._zip.close()
+        if not is_stream(self.path):
+            os.remove(self.path)
+
+    def close(self) -> None:
+        self._finish_sheet()
+        self._write_styles()
+
+        sheets = range(1, len(self._titles) + 1)
+        self._zip.writestr(
+            "[Content_Types].xml",
+            f'{_XML_DECLARATION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CONTENT_TYPE}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_CONTENT_TYPE}.styles+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{_CONTENT_TYPE}.worksheet+xml"/>'
+                for i in sheets
+            )
+            + "</Types>",
+        )
+        self._zip.writestr(
+            "_rels/.rels",
+            f'{_XML_DECLARATION}<Relationships xmlns="{_PACKAGE_RELATIONSHIPS_NAMESPACE}">'
+            f'<Relationship Id="rId1" Type="{_RELATIONSHIPS_NAMESPACE}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        self._zip.writestr(
+            "xl/workbook.xml",
+            f'{_XML_DECLARATION}<workbook xmlns="{_MAIN_NAMESPACE}" xmlns:r="{_RELATIONSHIPS_NAMESPACE}"><sheets>'
+            + "".join(
+                f'<sheet name={quoteattr(title)} sheetId="{i}" r:id="rId{i}"/>'
+                for i, title in zip(sheets, self._titles)
+            )
+            + "</sheets></workbook>",
+        )
+        self._zip.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'{_XML_DECLARATION}<Relationships xmlns="{_PACKAGE_RELATIONSHIPS_NAMESPACE}">'
+            + "".join(
+                f'<Relationship Id="rId{i}" Type="{_RELATIONSHIPS_NAMESPACE}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                for i in sheets
+            )
+            + f'<Relationship Id="rId{len(self._titles) + 1}" Type="{_RELATIONSHIPS_NAMESPACE}/styles" Target="styles.xml"/>'
+            "</Relationships>",
+        )
+        self._zip.close()
+
+
+class PngWriter(Writer):
+    """
+    Saves a `.png` preview of the output, drawing each cell as a square of `cell_size` pixels. Holds a single image.
+    """
+
+    extension = ".png"
+
+    def __init__(self, path: Output, **spreadsheet_kwargs) -> None:
+        super().__init__(path, **spreadsheet_kwargs)
+        self._strips: List[np.ndarray] = []
+        self._title = None
+
+    def add_sheet(
+        self,
+        title: str,
+        size: Tuple[int, int],
+        image_position: Tuple[int, int] = (1, 1),
+    ) -> None:
+        if self._title is not None:
+            raise ValueError("A .png preview can only hold a single image.")
+        self._add_title(title)
+        self._title = title
+
+    def write(self, colors: np.ndarray, empty: Optional[np.ndarray] = None) -> None:
+        colors = np.array(colors, dtype=np.uint8)
+        if empty is not None:
+            # Empty cells are white, like on a spreadsheet
+            colors[empty] = 255
+        self._strips.append(colors)
+
+    def close(self) -> None:
+        cell_size = self.spreadsheet_kwargs.get("cell_size", 8)
+        colors = np.concatenate(self._strips) if self._strips else np.zeros((0, 0, 3))
+        colors = colors.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        Image.fromarray(colors.astype(np.uint8), "RGB").save(self.path, format="PNG")
+
+
+class NpzWriter(Writer):
+    """
+    Saves the colors of each sheet as a compressed `numpy` `.npz` archive, keyed by the sheet's title. The image's position is saved under `<title>.image_position`, and which cells are empty (if any) under `<title>.empty`.
+    """
+
+    extension = ".npz"
+
+    def __init__(self, path: Output, **spreadsheet_kwargs) -> None:
+        super().__init__(path, **spreadsheet_kwargs)
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._strips: List[np.ndarray] = []
+        self._empty: List[np.ndarray] = []
+        self._title = None
+
+    def _finish_sheet(self) -> None:
+        if self._title is not None:
+            self._arrays[self._title] = (
+                np.concatenate(self._strips)
+                if self._strips
+                else np.zeros((0, 0, 3), dtype=np.uint8)
+            )
+            empty = np.concatenate(self._empty) if self._empty else None
+            if empty is not None and empty.any():
+                self._arrays[f"{self._title}.empty"] = empty
+            self._strips, self._empty = [], []
+
+    def add_sheet(
+        self,
+        title: str,
+        size: Tuple[int, int],
+        image_position: Tuple[int, int] = (1, 1),
+    ) -> None:
+        self._finish_sheet()
+        self._add_title(title)
+        self._title = title
+        self._arrays[f"{title}.image_position"] = np.array(image_position)
+
+    def write(self, colors: np.ndarray, empty: Optional[np.ndarray] = None) -> None:
+        colors = np.asarray(colors, dtype=np.uint8)
+        self._strips.append(colors)
+        self._empty.append(
+            np.zeros(colors.shape[:2], dtype=bool) if empty is None else empty
+        )
+
+    def close(self) -> None:
+        self._finish_sheet()
+        if is_stream(self.path):
+            np.savez_compressed(self.path, **self._arrays)
+            return
+        with open(self.path, "wb") as file:
+            np.savez_compressed(file, **self._arrays)
+
+
+WRITERS: Dict[str, Type[Writer]] = {
+    "openpyxl": OpenpyxlWriter,
+    "xlsx": XlsxWriter,
+    "png": PngWriter,
+    "npz": NpzWriter,
+}
+
+
+def get_writer(writer: Union[str, Type[Writer]]) -> Type[Writer]:
+    """
+    Finds a writer by its name, or returns it untouched if it already is a `Writer` subclass.
+
+    Raises
+        ValueError: "Unsupported writer. ..."
+    """
+    if isinstance(writer, type) and issubclass(writer, Writer):
+        return writer
+    if writer not in WRITERS:
+        raise ValueError(
+            f"Unsupported writer. Choose one of {', '.join(WRITERS)}, or a Writer subclass."
+        )
+    return WRITERS[writer]
+
+
+def save(
+    strips: Iterable[np.ndarray],
+    size: Tuple[int, int],
+    path: Output,
+    image_position: Tuple[int, int] = (1, 1),
+    writer: Union[str, Type[Writer]] = "openpyxl",
+    title: Optional[str] = None,
+    **spreadsheet_kwargs,
+) -> None:
+    """
+    Saves an image, given as strips of RGB colors, on a single sheet.
+
+    Args
+        strips: The image's rows, from top to bottom, as arrays of shape `(rows, width, 3)`.
+        size: The `(width, height)` of the image.
+        path: The path that you want to save your output file, or a writable binary stream.
+        image_position: The 1-based `(row, column)` of the image's top leftmost pixel.
+        writer: The writer's name (see `WRITERS`) or a `Writer` subclass. Defaults to `"openpyxl"`.
+        title: The sheet's title. Defaults to `path`'s file name, without its extension and with the characters Excel does not allow on titles replaced by `_`, or to `"image"` when saving to a stream.
+        **spreadsheet_kwargs: Optional parameters to tweak the output's appearance.
+
+    Raises
+        ValueError: "Invalid sheet title ..."
+    """
+    if title is None:
+        title = (
+            "image"
+            if is_stream(path)
+            else sheet_title(os.path.splitext(os.path.split(path)[1])[0], set())
+        )
+
+    with get_writer(writer)(path, **spreadsheet_kwargs) as w:
+        w.add_sheet(title, size, image_position)
+        for strip in strips:
+            w.write(strip)
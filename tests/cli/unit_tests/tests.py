@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves.cli import main
+
+
+def _make_images(directory, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.png")
+        colors = np.random.default_rng(i).integers(0, 256, (60, 90, 3), np.uint8)
+        Image.fromarray(colors).save(path)
+        paths.append(path)
+    return paths
+
+
+def _run(argv):
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stdout):
+        code = main(argv)
+    return code, stdout.getvalue()
+
+
+class TestCLI(unittest.TestCase):
+    def test_ascii_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _make_images(tmp, 2)
+            out = os.path.join(tmp, "out")
+            code, output = _run(["ascii", tmp, "-o", out, "--cols", "30"])
+            self.assertEqual(code, 0)
+            self.assertEqual(sorted(os.listdir(out)), ["image_0.txt", "image_1.txt"])
+            self.assertIn("2 converted, 0 skipped, 0 failed", output)
+
+    def test_skips_up_to_date_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _make_images(tmp, 1)
+            pattern = os.path.join(tmp, "*.png")
+            self.assertEqual(_run(["rubiks", pattern])[0], 0)
+            code, output = _run(["rubiks", pattern])
+            self.assertEqual(code, 0)
+            self.assertIn("0 converted, 1 skipped", output)
+            code, output = _run(["rubiks", pattern, "--force", "-t", "2"])
+            self.assertIn("1 converted, 0 skipped", output)
+
+    def test_parallel_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = _make_images(tmp, 3)
+            code, output = _run(["excel", *sources, "-j", "2"])
+            self.assertEqual(code, 0)
+            for source in sources:
+                self.assertTrue(os.path.exists(source[: -len(".png")] + ".xlsx"))
+
+    def test_same_output_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = os.path.join(tmp, "a"), os.path.join(tmp, "b")
+            os.mkdir(first)
+            os.mkdir(second)
+            for directory in (first, second):
+                Image.new("RGB", (30, 20), "white").save(
+                    os.path.join(directory, "x.png")
+                )
+            Image.new("RGB", (30, 20), "white").save(os.path.join(first, "x.jpg"))
+
+            out = os.path.join(tmp, "out")
+            code, output = _run(["ascii", first, second, "-o", out])
+            self.assertEqual(code, 1)
+            self.assertIn("would all be saved as", output)
+            self.assertFalse(os.path.exists(out))
+
+            code, output = _run(["excel", first])
+            self.assertEqual(code, 1)
+            self.assertFalse(os.path.exists(os.path.join(first, "x.xlsx")))
+
+    def test_failed_conversion_keeps_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (source,) = _make_images(tmp, 1)
+            self.assertEqual(_run(["rubiks", source])[0], 0)
+            output = source[: -len(".png")] + ".xlsx"
+            with open(output, "rb") as f:
+                previous = f.read()
+
+            code, _ = _run(["rubiks", source, "--force", "--lower-image-size-by", "0"])
+            self.assertEqual(code, 1)
+            with open(output, "rb") as f:
+                self.assertEqual(f.read(), previous)
+            self.assertEqual(sorted(os.listdir(tmp)), ["image_0.png", "image_0.xlsx"])
+
+    def test_missing_input(self):
+        code, output = _run(["ascii", "does_not_exist.png"])
+        self.assertEqual(code, 1)
+        self.assertIn("0 converted, 0 skipped, 1 failed", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
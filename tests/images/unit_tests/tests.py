@@ -0,0 +1,77 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves.images import image_size, is_image, load_image, resized_colors
+from unexpected_isaves.strips import iter_strips
+
+
+class TestLoadImage(unittest.TestCase):
+    def setUp(self):
+        self.colors = np.random.default_rng(0).integers(0, 256, (150, 80, 3), np.uint8)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "image.png")
+        Image.fromarray(self.colors).save(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_inputs(self):
+        with open(self.path, "rb") as file:
+            data = file.read()
+        for image in (self.path, data, bytearray(data), memoryview(data)):
+            loaded = load_image(image)
+            self.assertEqual(image_size(loaded), (80, 150))
+            self.assertTrue((np.asarray(loaded) == self.colors).all())
+
+    def test_arrays_untouched(self):
+        self.assertIs(load_image(self.colors), self.colors)
+        self.assertEqual(image_size(self.colors), (80, 150))
+        for array in (
+            self.colors[..., 0],
+            np.dstack([self.colors, self.colors[..., :1]]),
+        ):
+            self.assertIs(load_image(array), array)
+
+    def test_is_image(self):
+        with open(self.path, "rb") as file:
+            data = file.read()
+        for image in (self.path, data, bytearray(data), memoryview(data), self.colors):
+            self.assertTrue(is_image(image))
+        for images in ([self.colors], (self.path,), np.stack([self.colors] * 2)):
+            self.assertFalse(is_image(images))
+
+    def test_invalid(self):
+        for array in (self.colors.astype(np.float32), self.colors[..., :2]):
+            with self.assertRaises(ValueError):
+                load_image(array)
+        with self.assertRaises(ValueError):
+            load_image(os.path.join(self.tmp.name, "missing.png"))
+        with self.assertRaises(ValueError):
+            load_image(42)
+
+    def test_memmap_strips(self):
+        path = os.path.join(self.tmp.name, "image.raw")
+        array = np.memmap(path, np.uint8, "w+", shape=self.colors.shape)
+        array[:] = self.colors
+        image = load_image(array)
+
+        # Strips of an array that needs no resizing are views of it
+        strips = list(iter_strips(image, (80, 150), 64))
+        self.assertEqual([len(s) for s in strips], [64, 64, 22])
+        self.assertTrue(all(np.shares_memory(s, array) for s in strips))
+        self.assertIs(resized_colors(image, (80, 150)), image)
+
+        # Resized strips match the ones of the same image opened by Pillow
+        expected = list(iter_strips(Image.open(self.path), (40, 75), 16))
+        received = list(iter_strips(image, (40, 75), 16))
+        for e, r in zip(expected, received):
+            self.assertEqual(np.asarray(e).tolist(), np.asarray(r).tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves import save_image
+
+# Where Linux tells the process' current RSS. RSS is only checked where it exists
+_STATM = "/proc/self/statm"
+
+# The generated image's (width, height). Large enough for the converters' memory to
+# be dominated by the image rather than by the interpreter
+IMAGE_SIZE = (3000, 2000)
+
+# Peak memory, in bytes per pixel of the input image. `traced` is what Python and
+# numpy allocate (as seen by tracemalloc); `rss` is the whole process' growth,
+# which also counts Pillow's decoded image. `openpyxl` keeps a style and objects
+# for every cell, so the `excel` budget's `traced` is in bytes per output cell
+# instead, and `strips` holds the strip pipeline that feeds every writer, alone
+BUDGETS = {
+    "strips": {"traced": 0.6, "rss": 8},
+    "excel": {"traced": 3500, "rss": 35},
+    "excel_xlsx": {"traced": 2.5, "rss": 16},
+    "rubiks": {"traced": 1, "rss": 14},
+    "minecraft": {"traced": 2.5, "rss": 12},
+    "ascii": {"traced": 8, "rss": 14},
+}
+
+
+def _make_image(path):
+    # Smooth gradients with a grain of noise, so that colors vary like on a photo
+    width, height = IMAGE_SIZE
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, np.newaxis]
+    colors = np.empty((height, width, 3), dtype=np.uint8)
+    colors[:, :, 0] = x
+    colors[:, :, 1] = y
+    colors[:, :, 2] = (x + y) / 2
+    colors += rng.integers(0, 16, colors.shape, dtype=np.uint8)
+    Image.fromarray(colors).save(path)
+
+
+def _excel_strips(image_path, lower_image_size_by):
+    """
+    Runs the strips stage of `to_excel` on its own: resizing the image a strip at a time and reading each strip's colors, without saving them.
+    """
+    from unexpected_isaves.excel import excel
+    from unexpected_isaves.images import load_image
+
+    image = load_image(image_path)
+    size = excel._resized_size(image, lower_image_size_by)
+    for _ in excel._process(image, size):
+        pass
+
+
+def _rss():
+    with open(_STATM) as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples the process' RSS every few milliseconds, keeping its peak.
+    """
+
+    def __init__(self, interval=0.002):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, _rss())
+
+
+def _measure(convert, args, kwargs):
+    """
+    Runs a conversion and returns its peak traced memory and how much the process' RSS grew at its peak, in bytes.
+    """
+    sampler = None
+    if os.path.exists(_STATM):
+        rss_before = _rss()
+        sampler = _RssSampler()
+        sampler.start()
+
+    tracemalloc.start()
+    convert(*args, **kwargs)
+    _, traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if sampler is None:
+        return traced, None
+    sampler.stop()
+    return traced, sampler.peak - rss_before
+
+
+class TestMemoryBudget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.image_path = os.path.join(cls.tmp.name, "image.png")
+        _make_image(cls.image_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def _check(self, budget, convert, *args, cells=None, **kwargs):
+        # Each conversion gets a process of its own, so that memory kept by the
+        # allocator after earlier tests does not hide its peak
+        if isinstance(convert, str):
+            convert = getattr(save_image, f"to_{convert}")
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            traced, rss = executor.submit(_measure, convert, args, kwargs).result()
+        pixels = IMAGE_SIZE[0] * IMAGE_SIZE[1]
+        self.assertLessEqual(
+            traced / (cells or pixels),
+            BUDGETS[budget]["traced"],
+            f"{budget} traced {traced / 1e6:.1f}MB",
+        )
+        if rss is not None:
+            self.assertLessEqual(
+                rss / pixels, BUDGETS[budget]["rss"], f"{budget} RSS {rss / 1e6:.1f}MB"
+            )
+
+    def test_strips(self):
+        # Full size, so that the strips are as large as they get
+        self._check("strips", _excel_strips, self.image_path, 1)
+
+    def test_excel(self):
+        path = os.path.join(self.tmp.name, "excel.xlsx")
+        cells = (IMAGE_SIZE[0] // 20) * (IMAGE_SIZE[1] // 20)
+        self._check(
+            "excel",
+            "excel",
+            self.image_path,
+            path,
+            lower_image_size_by=20,
+            cells=cells,
+        )
+
+    def test_excel_xlsx_writer(self):
+        path = os.path.join(self.tmp.name, "excel_xlsx.xlsx")
+        self._check("excel_xlsx", "excel", self.image_path, path, writer="xlsx")
+
+    def test_rubiks(self):
+        path = os.path.join(self.tmp.name, "rubiks.xlsx")
+        self._check("rubiks", "rubiks", self.image_path, path)
+
+    def test_minecraft(self):
+        path = os.path.join(self.tmp.name, "minecraft")
+        self._check("minecraft", "minecraft", self.image_path, path)
+
+    def test_ascii(self):
+        self._check("ascii", "ascii", self.image_path, cols=200)
@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from unexpected_isaves.minecraft import (
+    BLOCKS_PATH,
+    fill_commands,
+    load_palette,
+    staircase_commands,
+    staircase_heights,
+    to_block_indices,
+)
+
+
+class TestToBlockIndices(unittest.TestCase):
+    def test_exact_colors(self):
+        colors, names = load_palette().colors, load_palette().names
+        self.assertEqual(names[0], "minecraft:grass_block")
+        indices = to_block_indices(colors[np.newaxis])
+        self.assertEqual(indices.dtype, np.uint8)
+        self.assertEqual(indices.tolist(), [list(range(len(colors)))])
+
+
+class TestLoadPalette(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.palette_file = os.path.join(self.tmp.name, "palette.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, blocks):
+        with open(self.palette_file, "w") as file:
+            json.dump(blocks, file)
+
+    def test_default(self):
+        with open(BLOCKS_PATH) as file:
+            blocks = json.load(file)
+        palette = load_palette()
+        self.assertIs(palette, load_palette())
+        self.assertEqual(palette.colors.tolist(), [block["rgb"] for block in blocks])
+        self.assertEqual(
+            palette.names.tolist(),
+            ["minecraft:" + block["blocks"][0] for block in blocks],
+        )
+
+    def test_exclude(self):
+        palette = load_palette(exclude=["minecraft:sand", "birch_log"])
+        self.assertEqual(palette.names[1], "minecraft:birch_planks")
+        palette = load_palette(exclude=["sand", "birch_planks"])
+        self.assertEqual(palette.names[1], "minecraft:birch_log[axis=y]")
+        self.assertEqual(len(palette.colors), len(load_palette().colors))
+
+    def test_include(self):
+        palette = load_palette(include=["white_wool", "black_wool", "sand"])
+        self.assertEqual(
+            sorted(palette.names.tolist()),
+            ["minecraft:black_wool", "minecraft:sand", "minecraft:white_wool"],
+        )
+        # Colors are mapped to the closest color left on the palette
+        white = palette.names.tolist().index("minecraft:white_wool")
+        indices = to_block_indices(np.array([[250, 250, 250]], np.uint8), 1, palette)
+        self.assertEqual(indices.tolist(), [white])
+        with self.assertRaises(ValueError):
+            load_palette(include=["sand"], exclude=["sand"])
+
+    def test_cached(self):
+        palette = load_palette(exclude=["sand", "gravel"])
+        self.assertIs(load_palette(exclude=("gravel", "minecraft:sand")), palette)
+        self.assertIsNot(load_palette(exclude=["gravel"]), palette)
+
+    def test_palette_file(self):
+        self._write([{"rgb": [0, 0, 0], "blocks": ["coal_block"]}])
+        palette = load_palette(palette_file=self.palette_file)
+        self.assertEqual(palette.names.tolist(), ["minecraft:coal_block"])
+        self.assertEqual(
+            fill_commands(np.zeros((1, 2), np.uint8), palette=palette),
+            ["fill 0 0 0 1 0 0 minecraft:coal_block"],
+        )
+
+        # Changing the file invalidates its cached palette
+        self._write([{"rgb": [255, 255, 255], "blocks": ["snow_block"]}])
+        os.utime(self.palette_file, ns=(0, 1))
+        palette = load_palette(palette_file=self.palette_file)
+        self.assertEqual(palette.names.tolist(), ["minecraft:snow_block"])
+
+    def test_invalid_palette_file(self):
+        for blocks in (
+            {},
+            [{"rgb": [0, 0], "blocks": ["stone"]}],
+            [{"rgb": [0, 0, 0]}],
+        ):
+            self._write(blocks)
+            with self.assertRaises(ValueError):
+                load_palette(palette_file=self.palette_file)
+
+
+class TestFillCommands(unittest.TestCase):
+    def test_rows(self):
+        indices = np.array([[0, 0, 1], [2, 2, 2]], np.uint8)
+        self.assertEqual(
+            fill_commands(indices),
+            [
+                "fill 0 0 0 1 0 0 minecraft:grass_block",
+                "fill 2 0 0 2 0 0 minecraft:sand",
+                "fill 0 0 1 2 0 1 minecraft:mushroom_stem",
+            ],
+        )
+
+    def test_columns(self):
+        indices = np.array([[0, 1], [0, 1], [0, 2]], np.uint8)
+        self.assertEqual(
+            fill_commands(indices, player_pos=(10, 64, -5)),
+            [
+                "fill 10 64 -5 10 64 -3 minecraft:grass_block",
+                "fill 11 64 -5 11 64 -4 minecraft:sand",
+                "fill 11 64 -3 11 64 -3 minecraft:mushroom_stem",
+            ],
+        )
+
+    def test_tie_uses_columns(self):
+        indices = np.array([[0, 1], [1, 0]], np.uint8)
+        self.assertEqual(
+            fill_commands(indices)[:2],
+            [
+                "fill 0 0 0 0 0 0 minecraft:grass_block",
+                "fill 0 0 1 0 0 1 minecraft:sand",
+            ],
+        )
+
+
+class TestStaircase(unittest.TestCase):
+    def setUp(self):
+        self.palette = load_palette(shaded=True)
+        self.blocks = len(load_palette().colors)
+
+    def _indices(self, blocks, shades):
+        return np.array(shades, np.uint8) * self.blocks + np.array(blocks, np.uint8)
+
+    def test_shaded_palette(self):
+        colors, names = load_palette().colors, load_palette().names
+        self.assertEqual(len(self.palette.colors), 3 * len(colors))
+        self.assertEqual(self.palette.colors[0].tolist(), [89, 125, 39])
+        self.assertEqual(self.palette.colors[2 * self.blocks].tolist(), [127, 178, 56])
+        self.assertEqual(self.palette.names[self.blocks], names[0])
+        with self.assertRaises(ValueError):
+            staircase_heights(np.zeros((1, 1), np.uint8), load_palette())
+
+    def test_heights(self):
+        # A climb, a flat step, a descent and a climb again, on a single column
+        indices = self._indices([[0]] * 6, [[2], [2], [1], [0], [0], [2]])
+        heights = staircase_heights(indices, self.palette)
+        self.assertEqual(heights[:, 0].tolist(), [0, 1, 2, 2, 1, 0, 1])
+
+    def test_commands(self):
+        indices = self._indices([[0, 1], [0, 1]], [[1, 2], [1, 1]])
+        heights = staircase_heights(indices, self.palette)
+        self.assertEqual(heights.tolist(), [[0, 0], [0, 1], [0, 1]])
+        self.assertEqual(
+            staircase_commands(indices, heights, (10, 64, 5), self.palette),
+            [
+                "fill 10 64 4 10 64 6 minecraft:grass_block",
+                "setblock 11 64 4 minecraft:sand",
+                "fill 11 65 5 11 65 6 minecraft:sand",
+            ],
+        )
+
+    def test_map_shades(self):
+        colors = np.random.default_rng(0).integers(0, 256, (40, 30, 3), np.uint8)
+        indices = to_block_indices(colors, 1, self.palette)
+        heights = staircase_heights(indices, self.palette)
+        # Each block compares with its northern neighbour as its shade says
+        shades = np.sign(np.diff(heights, axis=0)) + 1
+        self.assertEqual(shades.tolist(), (indices // self.blocks).tolist())
+        self.assertEqual(heights.min(axis=0).tolist(), [0] * 30)
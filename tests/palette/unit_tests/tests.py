@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from unexpected_isaves.palette import (
+    build_lookup,
+    candidate_table,
+    color_histogram,
+    median_cut,
+    nearest_color_indices,
+    reduce_colors,
+)
+
+
+class TestMedianCut(unittest.TestCase):
+    def setUp(self):
+        self.colors = np.random.default_rng(0).integers(0, 256, (200, 300, 3), np.uint8)
+        self.counts, self.sums = color_histogram(self.colors)
+
+    def test_histogram(self):
+        self.assertEqual(self.counts.sum(), 200 * 300)
+        self.assertEqual(self.sums.sum(), self.colors.sum())
+
+    def test_max_colors(self):
+        for max_colors in (1, 7, 64):
+            palette = median_cut(self.counts, self.sums, max_colors)
+            self.assertEqual(palette.shape, (max_colors, 3))
+            lookup = build_lookup(self.counts, self.sums, palette)
+            reduced = reduce_colors(self.colors, lookup, palette)
+            self.assertEqual(reduced.shape, self.colors.shape)
+            self.assertLessEqual(
+                len(np.unique(reduced.reshape(-1, 3), axis=0)), max_colors
+            )
+
+    def test_few_colors(self):
+        colors = np.array([[[0, 0, 0], [255, 255, 255], [0, 0, 0]]], np.uint8)
+        palette = median_cut(*color_histogram(colors), 256)
+        self.assertEqual(sorted(palette.tolist()), [[0, 0, 0], [255, 255, 255]])
+
+    def test_many_colors(self):
+        # Splitting stops once every bucket has its own box, however many colors are asked for
+        used = np.count_nonzero(self.counts)
+        palette = median_cut(self.counts, self.sums, 10**6)
+        self.assertEqual(len(palette), used)
+        self.assertEqual(len(median_cut(self.counts, self.sums, 4096)), 4096)
+
+    def test_invalid_max_colors(self):
+        with self.assertRaises(ValueError):
+            median_cut(self.counts, self.sums, 0)
+
+
+class TestNearestColorIndices(unittest.TestCase):
+    def test_ties_go_to_first_color(self):
+        palette = np.array([[0, 0, 0], [10, 0, 0], [0, 0, 0]], np.uint8)
+        colors = np.array([[5, 0, 0], [9, 0, 0], [0, 0, 1]], np.uint8)
+        self.assertEqual(nearest_color_indices(colors, palette).tolist(), [0, 1, 0])
+
+    def test_workers(self):
+        rng = np.random.default_rng(0)
+        colors = rng.integers(0, 256, (300, 100, 3), np.uint8)
+        palette = rng.integers(0, 256, (50, 3), np.uint8)
+        expected = nearest_color_indices(colors, palette)
+        for workers in (2, 7):
+            received = nearest_color_indices(colors, palette, workers)
+            self.assertEqual(received.tolist(), expected.tolist())
+
+    def test_candidates(self):
+        rng = np.random.default_rng(0)
+        colors = rng.integers(0, 256, (300, 100, 3), np.uint8)
+        # Repeated colors and a color halfway between two others make ties
+        palette = np.concatenate(
+            [rng.integers(0, 256, (50, 3), np.uint8), [[0, 0, 0], [0, 0, 0]]]
+        ).astype(np.uint8)
+        colors[0, :3] = [[0, 0, 0], [1, 1, 1], [128, 128, 128]]
+        for palette in (palette, palette[[-1]], np.array([[0, 0, 0], [2, 2, 2]])):
+            candidates = candidate_table(palette)
+            self.assertEqual(candidates.shape[0], 32768)
+            expected = nearest_color_indices(colors, palette)
+            received = nearest_color_indices(colors, palette, 2, candidates)
+            self.assertEqual(received.tolist(), expected.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from unexpected_isaves.progress import (
+    CancellationToken,
+    ConversionCancelled,
+    Progress,
+)
+
+
+class TestProgress(unittest.TestCase):
+    def test_throttled(self):
+        calls = []
+        progress = Progress(10, lambda done, total: calls.append((done, total)))
+        with patch("unexpected_isaves.progress.time.monotonic", return_value=0):
+            progress._last_report = 0
+            for done in range(1, 11):
+                progress.update(done)
+        # Only the last update is reported, as they all happened at once
+        self.assertEqual(calls, [(10, 10)])
+
+    def test_reports_after_interval(self):
+        calls = []
+        progress = Progress(10, lambda done, total: calls.append(done))
+        times = iter([0.05, 0.2, 0.25, 0.4])
+        with patch("unexpected_isaves.progress.time.monotonic", lambda: next(times)):
+            progress._last_report = 0
+            for done in (1, 2, 3, 4):
+                progress.update(done)
+        self.assertEqual(calls, [2, 4])
+
+    def test_track(self):
+        calls = []
+        progress = Progress(5, lambda done, total: calls.append(done))
+        strips = [[0, 1], [2, 3], [4]]
+        self.assertEqual(list(progress.track(iter(strips))), strips)
+        self.assertEqual(calls[-1], 5)
+
+
+class TestCancellationToken(unittest.TestCase):
+    def test_cancel_from_another_thread(self):
+        token = CancellationToken()
+        self.assertFalse(token.cancelled)
+        token.raise_if_cancelled()
+
+        thread = threading.Thread(target=token.cancel)
+        thread.start()
+        thread.join()
+        self.assertTrue(token.cancelled)
+        with self.assertRaises(ConversionCancelled):
+            token.raise_if_cancelled()
+
+    def test_track_stops(self):
+        token = CancellationToken()
+        strips = Progress(3, cancel_token=token).track(iter([[0], [1], [2]]))
+        next(strips)
+        token.cancel()
+        with self.assertRaises(ConversionCancelled):
+            next(strips)
+
+
+if __name__ == "__main__":
+    unittest.main()
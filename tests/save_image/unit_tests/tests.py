@@ -1,12 +1,30 @@
+import gc
+import html
+import io
 import json
 import os
+import re
 import tempfile
 import unittest
+import warnings
 from unittest.mock import patch
 from pathlib import Path
 from openpyxl import load_workbook, styles
 
-from unexpected_isaves.save_image import to_excel, to_minecraft, to_ascii
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves.save_image import (
+    to_excel,
+    to_excel_gallery,
+    to_excel_tiles,
+    to_minecraft,
+    to_ascii,
+    to_ascii_frames,
+    to_rubiks,
+)
+from unexpected_isaves.excel import excel
+from unexpected_isaves.progress import CancellationToken, ConversionCancelled
 
 IMG_PATH = f"{os.path.abspath(str(Path(__file__).parent.parent.parent))}/assets/python-logo.png"
 
@@ -45,6 +63,212 @@ class TestToExcel(unittest.TestCase):
                 self.assertEqual(cell.value, None, m2)
 
 
+class TestToExcelMaxColors(unittest.TestCase):
+    def test_max_colors(self):
+        outfile_path = tempfile.mkstemp()[1] + ".xlsx"
+        try:
+            to_excel(image=IMG_PATH, path=outfile_path, max_colors=8)
+            wb = load_workbook(outfile_path)
+        finally:
+            os.remove(outfile_path)
+        colors = {
+            cell.fill.start_color.index for row in wb.active.iter_rows() for cell in row
+        }
+        self.assertLessEqual(len(colors), 8)
+
+    def test_invalid_max_colors(self):
+        with self.assertRaises(ValueError):
+            to_excel(image=IMG_PATH, path="mustnt_save.xlsx", max_colors=0)
+
+
+class TestToExcelTiles(unittest.TestCase):
+    def test_sheets(self):
+        outfile_path = tempfile.mkstemp()[1] + ".xlsx"
+        try:
+            tiles = to_excel_tiles(
+                image=IMG_PATH, path=outfile_path, tile_size=(100, 80)
+            )
+            wb = load_workbook(outfile_path)
+        finally:
+            os.remove(outfile_path)
+        self.assertEqual(wb.sheetnames, ["index"] + tiles)
+        self.assertEqual(tiles[0], "r1c1")
+        self.assertEqual(tiles[-1], "r3c3")
+        index = [[c.value for c in row] for row in wb["index"].iter_rows()]
+        self.assertEqual(index[-1], ["r3c3", 3, 3, 201, 204, 161, 186])
+        self.assertEqual((wb["r3c3"].max_row, wb["r3c3"].max_column), (4, 26))
+        self.assertEqual(wb["index"]["A2"].hyperlink.location, "'r1c1'!A1")
+
+    def test_separate_workbooks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            outfile_path = os.path.join(tmp, "logo.xlsx")
+            tiles = to_excel_tiles(
+                image=IMG_PATH,
+                path=outfile_path,
+                tile_size=(100, 100),
+                separate_workbooks=True,
+                workers=2,
+            )
+            self.assertEqual(len(tiles), 6)
+            self.assertEqual(tiles[1], os.path.join(tmp, "logo_r1c2.xlsx"))
+            ws = load_workbook(tiles[1]).active
+            self.assertEqual((ws.max_row, ws.max_column), (100, 86))
+            index = load_workbook(outfile_path)["index"]
+            self.assertEqual(index["A3"].value, "logo_r1c2.xlsx")
+
+    def test_failed_tile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmpdir = os.path.join(tmp, "tmpdir")
+            os.mkdir(tmpdir)
+            outfile_path = os.path.join(tmp, "logo.xlsx")
+            failure = RuntimeError("The tile could not be saved.")
+
+            with patch.object(tempfile, "tempdir", tmpdir), patch(
+                "unexpected_isaves.writers.OpenpyxlWriter.write",
+                side_effect=[None, failure],
+            ):
+                with self.assertRaises(RuntimeError):
+                    to_excel_tiles(IMG_PATH, outfile_path, tile_size=(100, 80))
+            self.assertEqual(os.listdir(tmpdir), [])
+
+            save_tile = excel._save_tile
+            calls = []
+
+            def fail_second_tile(*args, **kwargs):
+                calls.append(args)
+                if len(calls) == 2:
+                    raise failure
+                save_tile(*args, **kwargs)
+
+            with patch.object(excel, "_save_tile", side_effect=fail_second_tile):
+                with self.assertRaises(RuntimeError):
+                    to_excel_tiles(
+                        IMG_PATH,
+                        outfile_path,
+                        tile_size=(100, 100),
+                        separate_workbooks=True,
+                    )
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(sorted(os.listdir(tmp)), ["tmpdir"])
+
+    def test_tile_size_too_wide(self):
+        with self.assertRaises(ValueError):
+            to_excel_tiles(
+                image=IMG_PATH, path="mustnt_save.xlsx", tile_size=(10, 20000)
+            )
+
+
+class TestToExcelGallery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outfile_path = os.path.join(self.tmp.name, "gallery.xlsx")
+        self.red = Image.new("RGB", (30, 20), (255, 0, 0))
+        self.blue = Image.new("RGB", (20, 40), (0, 0, 255))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sheets(self):
+        for writer in ("openpyxl", "xlsx"):
+            sheets = to_excel_gallery(
+                [IMG_PATH, self.red, self.blue],
+                self.outfile_path,
+                writer=writer,
+                overwrite=True,
+            )
+            self.assertEqual(sheets, ["python-logo", "image", "image (2)"])
+            wb = load_workbook(self.outfile_path)
+            self.assertEqual(wb.sheetnames, sheets)
+            self.assertEqual((wb["image"].max_row, wb["image"].max_column), (2, 3))
+            self.assertEqual(wb["image (2)"]["B4"].fill.start_color.rgb[-6:], "0000ff")
+
+    def test_positions(self):
+        sheets = to_excel_gallery(
+            [self.red, self.blue],
+            self.outfile_path,
+            image_positions=[(2, 2), (3, 4)],
+            sheet_names=["ignored", "ignored"],
+        )
+        self.assertEqual(sheets, ["gallery"])
+        ws = load_workbook(self.outfile_path)["gallery"]
+        fills = {
+            cell.coordinate: cell.fill.start_color.rgb[-6:]
+            for row in ws.iter_rows()
+            for cell in row
+            if cell.fill.fill_type == "solid"
+        }
+        # The blue image is drawn over the red one where they overlap
+        self.assertEqual(fills["B2"], "ff0000")
+        self.assertEqual(fills["D3"], "0000ff")
+        self.assertEqual(fills["E6"], "0000ff")
+        self.assertNotIn("B4", fills)
+        self.assertEqual(len(fills), 6 + 8 - 1)
+
+    def test_existing_path(self):
+        open(self.outfile_path, "w").close()
+        with self.assertRaisesRegex(ValueError, "already exists"):
+            to_excel_gallery([self.red], self.outfile_path)
+        with self.assertRaisesRegex(ValueError, "already exists"):
+            to_excel_gallery([self.red], self.outfile_path, image_positions=[(0, 0)])
+        self.assertEqual(os.path.getsize(self.outfile_path), 0)
+
+
+class TestInMemoryOutputs(unittest.TestCase):
+    def test_excel_bytes(self):
+        data = to_excel(IMG_PATH, lower_image_size_by=50, writer="xlsx", title="logo")
+        wb = load_workbook(io.BytesIO(data))
+        self.assertEqual(wb.sheetnames, ["logo"])
+        self.assertEqual((wb["logo"].max_row, wb["logo"].max_column), (40, 37))
+
+    def test_excel_stream(self):
+        stream = io.BytesIO()
+        self.assertIsNone(to_excel(IMG_PATH, stream, lower_image_size_by=50))
+        self.assertFalse(stream.closed)
+        stream.seek(0)
+        self.assertEqual(load_workbook(stream).sheetnames, ["image"])
+
+    def test_rubiks(self):
+        cubes, data = to_rubiks(IMG_PATH, lower_image_size_by=50, writer="xlsx")
+        self.assertEqual(cubes, 12 * 13)
+        self.assertEqual(load_workbook(io.BytesIO(data)).active.max_row, 39)
+        stream = io.BytesIO()
+        self.assertEqual(to_rubiks(IMG_PATH, stream, 50), cubes)
+        self.assertEqual(stream.getvalue()[:2], b"PK")
+
+
+class TestImageInputs(unittest.TestCase):
+    def setUp(self):
+        self.logo = Image.open(IMG_PATH).convert("RGB")
+        self.colors = np.asarray(self.logo)
+        with open(IMG_PATH, "rb") as file:
+            self.data = file.read()
+
+    def test_excel(self):
+        expected = to_excel(self.logo, lower_image_size_by=50, writer="npz")
+        for image in (self.colors, self.data, memoryview(self.data)):
+            self.assertEqual(
+                to_excel(image, lower_image_size_by=50, writer="npz"), expected
+            )
+
+    def test_rubiks(self):
+        expected = to_rubiks(self.logo, lower_image_size_by=50, writer="npz")
+        received = to_rubiks(self.colors, lower_image_size_by=50, writer="npz")
+        self.assertEqual(received, expected)
+
+    @patch("unexpected_isaves.save_image.__to_minecraft_save")
+    def test_minecraft(self, mock_to_minecraft_save):
+        for image in (self.logo, self.colors, self.data):
+            to_minecraft(image, "mustnt_save", lower_image_size_by=50)
+        calls = [c[0][0] for c in mock_to_minecraft_save.call_args_list]
+        self.assertEqual(calls[1], calls[0])
+        self.assertEqual(calls[2], calls[0])
+
+    def test_ascii(self):
+        expected = to_ascii(IMG_PATH, cols=30)
+        self.assertEqual(to_ascii(self.data, cols=30), expected)
+        self.assertEqual(to_ascii(bytearray(self.data), cols=30), expected)
+
+
 class TestToMinecraft(unittest.TestCase):
     @patch("unexpected_isaves.save_image.__to_minecraft_save")
     def test_default(self, mock_to_minecraft_save):
@@ -351,6 +575,36 @@ class TestToMinecraft(unittest.TestCase):
             "1.18.2",
         )
 
+    @patch("unexpected_isaves.save_image.__to_minecraft_save")
+    def test_exclude_blocks(self, mock_to_minecraft_save):
+        to_minecraft(
+            image=IMG_PATH,
+            path="mustnt_save",
+            lower_image_size_by=50,
+            exclude_blocks=["black_wool", "cyan_wool"],
+        )
+        commands = mock_to_minecraft_save.call_args[0][0]
+        self.assertTrue(commands)
+        self.assertFalse(
+            [c for c in commands if c.endswith(("black_wool", "cyan_wool"))]
+        )
+
+    @patch("unexpected_isaves.save_image.__to_minecraft_save")
+    def test_staircase(self, mock_to_minecraft_save):
+        to_minecraft(
+            image=IMG_PATH,
+            path="mustnt_save",
+            lower_image_size_by=50,
+            player_pos=(0, 64, 0),
+            staircase=True,
+        )
+        commands = mock_to_minecraft_save.call_args[0][0]
+        heights = {int(c.split()[2]) for c in commands}
+        self.assertEqual(min(heights), 64)
+        self.assertGreater(len(heights), 1)
+        # The row shading the image's first row is built north of it
+        self.assertIn(-1, {int(c.split()[3]) for c in commands})
+
 
 ascii_expected_default = """@@@@@@@@@@@@@@@@@@@@@@@@@%%##*****+++++++******###%@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 @@@@@@@@@@@@@@@@@@@@@@#*+++++++++++++++++************#@@@@@@@@@@@@@@@@@@@@@@@@@@
@@ -413,6 +667,128 @@ class TestToASCII(unittest.TestCase):
     def test_custom_cols(self):
         self.assertEqual(to_ascii(image=IMG_PATH, cols=30), ascii_expected_30_cols)
 
+    def test_ansi_color(self):
+        colored = to_ascii(image=IMG_PATH, cols=30, color="ansi")
+        rows = colored.split("\n")
+        self.assertTrue(all(row.endswith("\x1b[0m") for row in rows))
+        # the first row starts with a run of black characters sharing one code
+        self.assertTrue(rows[0].startswith("\x1b[38;2;0;0;0m@@@@@@@\x1b["))
+        plain = re.sub("\x1b\\[[0-9;]*m", "", colored)
+        self.assertEqual(plain, ascii_expected_30_cols)
+
+    def test_html_color(self):
+        colored = to_ascii(image=IMG_PATH, cols=30, color="html", more_levels=True)
+        rows = colored.split("\n")
+        self.assertTrue(
+            rows[0].startswith('<span style="color:#000000">$$$$$$$</span>')
+        )
+        plain = to_ascii(image=IMG_PATH, cols=30, more_levels=True)
+        self.assertEqual(html.unescape(re.sub("<[^>]+>", "", colored)), plain)
+
+
+class TestToASCIIFrames(unittest.TestCase):
+    def setUp(self):
+        logo = Image.open(IMG_PATH).convert("RGB")
+        self.frames = [logo, logo.rotate(180), logo.rotate(180)]
+
+    def test_matches_to_ascii(self):
+        expected = [to_ascii(frame, cols=30) for frame in self.frames]
+        self.assertEqual(list(to_ascii_frames(self.frames, cols=30)), expected)
+
+    def test_only_changed_rows(self):
+        updates = list(to_ascii_frames(self.frames, cols=30, only_changed_rows=True))
+        rows = ascii_expected_30_cols.split("\n")
+        self.assertEqual(updates[0], list(enumerate(rows)))
+        self.assertTrue(updates[1])
+        self.assertEqual(updates[2], [])
+
+    def test_animated_gif(self):
+        outfile_path = tempfile.mkstemp()[1] + ".gif"
+        try:
+            self.frames[0].save(
+                outfile_path, save_all=True, append_images=self.frames[1:2]
+            )
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", ResourceWarning)
+                rendered = list(to_ascii_frames(outfile_path, cols=30))
+                gc.collect()
+            with open(outfile_path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(outfile_path)
+        self.assertEqual(len(rendered), 2)
+        self.assertEqual(
+            [w for w in caught if issubclass(w.category, ResourceWarning)], []
+        )
+        for buffer in (data, bytearray(data), memoryview(data)):
+            self.assertEqual(list(to_ascii_frames(buffer, cols=30)), rendered)
+
+    def test_array_frames(self):
+        colors = np.asarray(self.frames[0])
+        expected = [to_ascii(self.frames[0], cols=30)]
+        self.assertEqual(list(to_ascii_frames(colors, cols=30)), expected)
+        self.assertEqual(
+            list(to_ascii_frames(np.stack([colors, colors]), cols=30)), expected * 2
+        )
+
+    def test_frames_of_different_sizes(self):
+        frames = to_ascii_frames([self.frames[0], self.frames[0].resize((300, 300))])
+        with self.assertRaises(ValueError):
+            list(frames)
+
+
+class TestProgressAndCancellation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outfile_path = os.path.join(self.tmp.name, "out.xlsx")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_progress_reaches_total(self):
+        for convert in (
+            lambda callback: to_excel(IMG_PATH, self.outfile_path, progress=callback),
+            lambda callback: to_rubiks(IMG_PATH, self.outfile_path, progress=callback),
+            lambda callback: to_ascii(IMG_PATH, progress=callback),
+        ):
+            calls = []
+            convert(lambda done, total: calls.append((done, total)))
+            self.assertTrue(calls)
+            self.assertEqual(calls[-1][0], calls[-1][1])
+            self.assertEqual(calls, sorted(calls))
+            if os.path.exists(self.outfile_path):
+                os.remove(self.outfile_path)
+
+    @patch("unexpected_isaves.save_image.__to_minecraft_save")
+    def test_minecraft_progress(self, mock_to_minecraft_save):
+        calls = []
+        to_minecraft(
+            IMG_PATH,
+            "mustnt_save",
+            lower_image_size_by=50,
+            progress=lambda done, total: calls.append((done, total)),
+        )
+        self.assertEqual(calls[-1], (40, 40))
+
+    def test_cancelled_leaves_no_file(self):
+        token = CancellationToken()
+        token.cancel()
+        for writer in ("openpyxl", "xlsx", "png", "npz"):
+            with self.assertRaises(ConversionCancelled):
+                to_excel(IMG_PATH, self.outfile_path, writer=writer, cancel_token=token)
+            self.assertFalse(os.path.exists(self.outfile_path))
+        with self.assertRaises(ConversionCancelled):
+            to_ascii(IMG_PATH, path=self.outfile_path, cancel_token=token)
+        self.assertFalse(os.path.exists(self.outfile_path))
+
+    @patch("unexpected_isaves.save_image.__to_minecraft_save")
+    def test_minecraft_cancelled(self, mock_to_minecraft_save):
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(ConversionCancelled):
+            to_minecraft(IMG_PATH, "mustnt_save", cancel_token=token)
+        mock_to_minecraft_save.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
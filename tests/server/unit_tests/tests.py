@@ -0,0 +1,203 @@
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves import server
+
+
+def _request(connection, method, url, body=None):
+    connection.request(
+        method,
+        url,
+        body=json.dumps(body) if body is not None else None,
+        headers={"Content-Type": "application/json"},
+    )
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+class TestConversionServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.image_path = os.path.join(cls.tmp.name, "image.png")
+        colors = np.random.default_rng(0).integers(0, 256, (90, 120, 3), np.uint8)
+        Image.fromarray(colors).save(cls.image_path)
+
+        cls.server = server.ConversionServer(
+            ("127.0.0.1", 0), workers=2, quiet=True, root=cls.tmp.name
+        )
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def _connect(self):
+        return http.client.HTTPConnection(*self.server.server_address)
+
+    def test_converters(self):
+        connection = self._connect()
+        status, body = _request(
+            connection, "POST", "/convert/ascii", {"image": self.image_path, "cols": 20}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body["result"].splitlines()[0]), 20)
+
+        path = os.path.join(self.tmp.name, "rubiks.xlsx")
+        status, body = _request(
+            connection,
+            "POST",
+            "/convert/rubiks",
+            {"image": self.image_path, "path": path},
+        )
+        self.assertEqual((status, body), (200, {"result": 12}))
+        self.assertTrue(os.path.exists(path))
+
+        connection.request(
+            "POST",
+            "/convert/rubiks",
+            json.dumps({"image": "image.png"}),
+            {"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("X-Rubiks-Cubes"), "12")
+        self.assertEqual(response.read()[:2], b"PK")
+
+        path = os.path.join(self.tmp.name, "minecraft")
+        status, _ = _request(
+            connection,
+            "POST",
+            "/convert/minecraft",
+            {"image": self.image_path, "path": path, "player_pos": [1, 2, 3]},
+        )
+        self.assertEqual(status, 200)
+        self.assertTrue(os.path.exists(os.path.join(path, "pack.mcmeta")))
+
+    def test_concurrent_requests(self):
+        def convert(i):
+            path = os.path.join(self.tmp.name, f"excel_{i}.xlsx")
+            return _request(
+                self._connect(),
+                "POST",
+                "/convert/excel",
+                {"image": self.image_path, "path": path, "writer": "xlsx"},
+            )
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            replies = list(executor.map(convert, range(6)))
+        self.assertEqual(replies, [(200, {"result": None})] * 6)
+
+        status, stats = _request(self._connect(), "GET", "/stats")
+        self.assertEqual(status, 200)
+        self.assertEqual((stats["queued"], stats["running"]), (0, 0))
+        self.assertGreaterEqual(stats["converters"]["excel"]["served"], 6)
+        latency = stats["converters"]["excel"]["latency"]
+        self.assertLessEqual(latency["p50"], latency["max"])
+
+    def test_errors(self):
+        connection = self._connect()
+        status, body = _request(
+            connection, "POST", "/convert/rubiks", {"image": "missing.png", "path": "x"}
+        )
+        self.assertEqual(status, 400)
+        self.assertIn("Image path not found", body["error"])
+
+        status, _ = _request(connection, "POST", "/convert/ascii", {"colour": "ansi"})
+        self.assertEqual(status, 400)
+        status, _ = _request(connection, "POST", "/convert/ascii", [1, 2])
+        self.assertEqual(status, 400)
+        status, _ = _request(connection, "POST", "/convert/docx", {})
+        self.assertEqual(status, 404)
+        self.assertEqual(
+            _request(connection, "GET", "/health"), (200, {"status": "ok"})
+        )
+
+    def test_content_type(self):
+        path = os.path.join(self.tmp.name, "plain.xlsx")
+        connection = self._connect()
+        connection.request(
+            "POST",
+            "/convert/excel",
+            json.dumps({"image": self.image_path, "path": path}),
+            {"Content-Type": "text/plain"},
+        )
+        response = connection.getresponse()
+        self.assertEqual(response.status, 415)
+        response.read()
+        self.assertFalse(os.path.exists(path))
+
+    def test_outside_root(self):
+        with tempfile.TemporaryDirectory() as outside:
+            path = os.path.join(outside, "out.xlsx")
+            with open(path, "w") as f:
+                f.write("keep")
+            link = os.path.join(self.tmp.name, "link")
+            os.symlink(outside, link)
+            self.addCleanup(os.remove, link)
+
+            connection = self._connect()
+            for kwargs in (
+                {"image": self.image_path, "path": path},
+                {"image": self.image_path, "path": "../out.xlsx"},
+                {"image": self.image_path, "path": os.path.join("link", "out.xlsx")},
+                {"image": os.path.join(outside, "out.xlsx")},
+            ):
+                status, body = _request(connection, "POST", "/convert/excel", kwargs)
+                self.assertEqual(status, 400)
+                self.assertIn("outside of the server's root", body["error"])
+            with open(path) as f:
+                self.assertEqual(f.read(), "keep")
+
+    def test_remote_host(self):
+        with self.assertRaises(ValueError):
+            server.ConversionServer(("0.0.0.0", 0), quiet=True)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not supported")
+class TestUnixConversionServer(unittest.TestCase):
+    def test_ascii(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            image_path = os.path.join(tmp, "image.png")
+            Image.new("RGB", (40, 30), "white").save(image_path)
+            socket_path = os.path.join(tmp, "server.sock")
+
+            unix_server = server.UnixConversionServer(socket_path, quiet=True, root=tmp)
+            thread = threading.Thread(target=unix_server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                status, body = _request(
+                    _UnixConnection(socket_path),
+                    "POST",
+                    "/convert/ascii",
+                    {"image": image_path, "cols": 10},
+                )
+            finally:
+                unix_server.shutdown()
+                unix_server.server_close()
+
+            self.assertEqual(status, 200)
+            self.assertEqual(body["result"].splitlines()[0], " " * 10)
+            self.assertFalse(os.path.exists(socket_path))
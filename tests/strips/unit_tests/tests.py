@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from unexpected_isaves.strips import iter_strips, map_strips
+
+
+class TestIterStrips(unittest.TestCase):
+    def setUp(self):
+        colors = np.random.default_rng(0).integers(0, 256, (1001, 733, 4), np.uint8)
+        self.image = Image.fromarray(colors)
+
+    def test_matches_full_resize(self):
+        for factor in (1, 3, 10):
+            size = (self.image.size[0] // factor, self.image.size[1] // factor)
+            expected = np.asarray(self.image.convert("RGB").resize(size)).astype(int)
+            for strip_height in (1, 7, 64):
+                strips = list(iter_strips(self.image, size, strip_height))
+                received = np.concatenate([np.asarray(s) for s in strips]).astype(int)
+                self.assertEqual(received.shape, expected.shape)
+                self.assertLessEqual(np.abs(received - expected).max(), 1)
+
+    def test_strip_heights(self):
+        strips = list(iter_strips(self.image, (73, 100), 30))
+        self.assertEqual([s.size for s in strips], [(73, 30)] * 3 + [(73, 10)])
+        self.assertTrue(all(s.mode == "RGB" for s in strips))
+
+
+class TestMapStrips(unittest.TestCase):
+    def test_keeps_order(self):
+        image = Image.fromarray(
+            np.random.default_rng(0).integers(0, 256, (500, 40, 3), np.uint8)
+        )
+        strips = list(iter_strips(image, (40, 500), 7))
+        expected = [np.asarray(s).sum() for s in strips]
+        for workers in (1, 3):
+            received = list(
+                map_strips(lambda s: np.asarray(s).sum(), iter(strips), workers)
+            )
+            self.assertEqual(received, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
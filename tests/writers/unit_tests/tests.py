@@ -0,0 +1,160 @@
+import io
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+import numpy as np
+from openpyxl import load_workbook
+from PIL import Image
+
+from unexpected_isaves.progress import CancellationToken, ConversionCancelled, Progress
+from unexpected_isaves.save_image import to_excel
+from unexpected_isaves.writers import WRITERS, get_writer, save, sheet_title
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.colors = np.random.default_rng(0).integers(0, 256, (10, 7, 3), np.uint8)
+        self.strips = [self.colors[:4], self.colors[4:]]
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _cells(self, path):
+        ws = load_workbook(path).active
+        fills = [
+            [cell.fill.start_color.rgb[-6:] for cell in row]
+            for row in ws.iter_rows(min_row=2, min_col=3)
+        ]
+        values = [[cell.value for cell in row] for row in ws.iter_rows()]
+        return ws.title, fills, values
+
+    def test_xlsx_matches_openpyxl(self):
+        results = []
+        for writer in ("openpyxl", "xlsx"):
+            path = os.path.join(self.tmp.name, f"{writer}.xlsx")
+            save(
+                self.strips,
+                (7, 10),
+                path,
+                image_position=(2, 3),
+                writer=writer,
+                delete_cell_value=False,
+            )
+            results.append(self._cells(path))
+
+        (_, openpyxl_fills, openpyxl_values), (title, fills, values) = results
+        self.assertEqual(title, "xlsx")
+        self.assertEqual(fills, openpyxl_fills)
+        self.assertEqual(values, openpyxl_values)
+        self.assertEqual(fills[0][0], "%02x%02x%02x" % tuple(self.colors[0, 0]))
+        self.assertIsNone(values[0][0])
+
+    def test_png(self):
+        path = os.path.join(self.tmp.name, "preview.png")
+        save(self.strips, (7, 10), path, writer="png", cell_size=2)
+        preview = np.asarray(Image.open(path))
+        self.assertEqual(preview.shape, (20, 14, 3))
+        self.assertTrue((preview[::2, ::2] == self.colors).all())
+
+    def test_npz(self):
+        path = os.path.join(self.tmp.name, "grid.npz")
+        save(self.strips, (7, 10), path, image_position=(2, 3), writer="npz")
+        with np.load(path) as grid:
+            self.assertTrue((grid["grid"] == self.colors).all())
+            self.assertEqual(grid["grid.image_position"].tolist(), [2, 3])
+
+    def test_empty_cells(self):
+        empty = np.zeros((10, 7), dtype=bool)
+        empty[2:5, 1:3] = True
+        for writer in ("openpyxl", "xlsx", "npz"):
+            path = os.path.join(self.tmp.name, f"empty_{writer}")
+            with get_writer(writer)(path) as w:
+                w.add_sheet("sheet", (7, 10))
+                w.write(self.colors, empty)
+            if writer == "npz":
+                with np.load(path) as grid:
+                    self.assertEqual(grid["sheet.empty"].tolist(), empty.tolist())
+                continue
+            os.rename(path, path + ".xlsx")
+            ws = load_workbook(path + ".xlsx").active
+            painted = [
+                [cell.fill.fill_type == "solid" for cell in row]
+                for row in ws.iter_rows(max_row=10, max_col=7)
+            ]
+            self.assertEqual(painted, (~empty).tolist())
+
+    def test_streams(self):
+        for writer in WRITERS:
+            stream = io.BytesIO()
+            save(self.strips, (7, 10), stream, writer=writer)
+            self.assertFalse(stream.closed)
+            stream.seek(0)
+            if writer in ("openpyxl", "xlsx"):
+                self.assertEqual(self._cells(stream)[0], "image")
+            elif writer == "png":
+                self.assertEqual(Image.open(stream).size, (56, 80))
+            else:
+                self.assertEqual(
+                    np.load(stream)["image"].tolist(), self.colors.tolist()
+                )
+
+    def test_titles(self):
+        for writer in WRITERS:
+            for title in ("a[1]", "a/b", "", "x" * 32, "'quoted'"):
+                with self.assertRaises(ValueError):
+                    save(self.strips, (7, 10), io.BytesIO(), writer=writer, title=title)
+
+        for writer in ("openpyxl", "xlsx"):
+            path = os.path.join(self.tmp.name, f"a[1] {writer}.xlsx")
+            save(self.strips, (7, 10), path, writer=writer)
+            self.assertEqual(self._cells(path)[0], f"a_1_ {writer}")
+
+            with get_writer(writer)(io.BytesIO()) as w:
+                w.add_sheet("Image", (7, 10))
+                w.write(self.colors)
+                with self.assertRaises(ValueError):
+                    w.add_sheet("image", (7, 10))
+
+        used = set()
+        self.assertEqual(sheet_title("a/b", used), "a_b")
+        self.assertEqual(sheet_title("A/B", used), "A_B (2)")
+        self.assertEqual(sheet_title("'", used), "image")
+
+    def test_cancelled(self):
+        tmpdir = os.path.join(self.tmp.name, "tmpdir")
+        os.mkdir(tmpdir)
+
+        def cancelled_strips():
+            yield self.strips[0]
+            token.cancel()
+            yield self.strips[1]
+
+        with mock.patch.object(tempfile, "tempdir", tmpdir), warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for writer in WRITERS:
+                token = CancellationToken()
+                path = os.path.join(self.tmp.name, f"cancelled.{writer}")
+                strips = Progress(10, cancel_token=token).track(cancelled_strips())
+                with self.assertRaises(ConversionCancelled):
+                    save(strips, (7, 10), path, writer=writer)
+                self.assertFalse(os.path.exists(path))
+
+            token = CancellationToken()
+            with self.assertRaises(ConversionCancelled):
+                to_excel(
+                    self.colors,
+                    os.path.join(self.tmp.name, "cancelled.xlsx"),
+                    lower_image_size_by=1,
+                    progress=lambda done, total: token.cancel(),
+                    cancel_token=token,
+                )
+        self.assertEqual(os.listdir(tmpdir), [])
+
+    def test_get_writer(self):
+        self.assertIs(get_writer(WRITERS["xlsx"]), WRITERS["xlsx"])
+        with self.assertRaises(ValueError):
+            get_writer("docx")